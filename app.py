@@ -1,44 +1,126 @@
-from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify
-from werkzeug.security import generate_password_hash, check_password_hash
-from datetime import datetime, timedelta
+from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify, g, Response
+from flask_caching import Cache
+from flask_compress import Compress
+from flask_limiter import Limiter
+from flask_limiter.util import get_remote_address
+from werkzeug.routing import BaseConverter
+from datetime import datetime
+import functools
+import io
 import json
+import logging
+import numpy as np
+import orjson
 import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
 
 from utils.technical_indicators import TechnicalIndicators, analyze_stock_technical
 import yfinance as yf
 import pytz
-from werkzeug.utils import secure_filename
-from PIL import Image
-import json
 
 # Import custom modules
-from database.db_connection import get_db_connection
-from utils.data_fetch import fetch_stock_data
+from database.db_connection import db_cursor
+from utils.data_fetch import fetch_stock_data, fetch_many_stock_data, fetch_spark_quotes, iter_spark_quotes, fetch_download_quotes, fetch_quote_type_name
 from utils.preprocess import preprocess_data
-from model.train_model import train_and_predict
-from utils.news_fetcher import get_all_news, get_market_summary, get_trending_stocks
+from utils.news_fetcher import get_all_news, get_market_summary
+from utils.passwords import hash_password, verify_password, needs_rehash, DUMMY_PASSWORD_HASH
+from utils.json_provider import OrjsonProvider
+
+# Library modules log through the logging module; show warnings and above
+# by default (LOG_LEVEL=DEBUG shows every fetch)
+logging.basicConfig(level=os.getenv('LOG_LEVEL', 'WARNING').upper())
 
 app = Flask(__name__)
 app.secret_key = 'your_secret_key_here_change_in_production'
 
+# orjson serializes responses faster and handles numpy/pandas scalars and datetimes
+app.json = OrjsonProvider(app)
+
+# Cache backend (set CACHE_TYPE=RedisCache and CACHE_REDIS_URL to share across workers)
+cache = Cache(app, config={
+    'CACHE_TYPE': os.getenv('CACHE_TYPE', 'SimpleCache'),
+    'CACHE_REDIS_URL': os.getenv('CACHE_REDIS_URL', 'redis://localhost:6379/0'),
+    'CACHE_DEFAULT_TIMEOUT': 60
+})
+
+# Rate limiting (caps password-hash CPU spend from brute-force attempts)
+limiter = Limiter(
+    get_remote_address,
+    app=app,
+    storage_uri=os.getenv('RATELIMIT_STORAGE_URI', 'memory://')
+)
+
+# Compress HTML/JSON responses (Brotli when the client accepts it, else gzip);
+# chart-data payloads are repetitive numeric JSON and shrink several-fold
+app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+app.config['COMPRESS_MIN_SIZE'] = 1024
+Compress(app)
+
+class StockSymbolConverter(BaseConverter):
+    """
+    URL converter for ticker symbols (e.g. RELIANCE.NS, M&M.NS, ^NSEI, USDINR=X)
+    
+    Malformed symbols fail to match the route (404) before the view runs,
+    so scrapers and typos never reach Yahoo Finance. Matched symbols are
+    uppercased once here for every downstream cache key and fetch.
+    """
+    regex = r'[A-Za-z0-9.&^=_-]{1,20}'
+    
+    def to_python(self, value):
+        return value.upper()
+
+app.url_map.converters['symbol'] = StockSymbolConverter
+
+# Requests slower than this are logged (milliseconds)
+SLOW_REQUEST_MS = 100
+
+@app.before_request
+def start_request_timer():
+    """Record when the request started"""
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def log_slow_request(response):
+    """Log requests that took longer than SLOW_REQUEST_MS"""
+    start = g.get('request_start')
+    if start is not None:
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if elapsed_ms > SLOW_REQUEST_MS:
+            app.logger.warning("Slow request (%.0f ms): %s %s", elapsed_ms, request.method, request.path)
+    return response
+
 # Create necessary directories
 os.makedirs('static/plots', exist_ok=True)
 os.makedirs('model', exist_ok=True)
 
-
-
+# Configuration for file uploads
 UPLOAD_FOLDER = 'static/uploads/avatars'
-ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
+ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = 5 * 1024 * 1024  # 5MB max file size
 
 # Create upload directory if it doesn't exist
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+os.makedirs('static/images', exist_ok=True)
 
 def allowed_file(filename):
     """Check if file extension is allowed"""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+# Avatar filenames are unique per upload, so browsers/CDNs can keep them forever.
+# Other static files (css, js, regenerated plots) keep Flask's default revalidation.
+AVATAR_STATIC_PREFIX = '/static/uploads/avatars/'
+AVATAR_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+@app.after_request
+def cache_avatar_responses(response):
+    """Mark served avatar images as long-lived and immutable"""
+    if request.path.startswith(AVATAR_STATIC_PREFIX) and response.status_code == 200:
+        response.headers['Cache-Control'] = AVATAR_CACHE_CONTROL
+    return response
+
 # ============================================================================
 # PROFILE & SETTINGS ROUTES
 # ============================================================================
@@ -46,26 +128,110 @@ def allowed_file(filename):
 try:
     from PIL import Image
     PIL_AVAILABLE = True
+    # Refuse decompression bombs before allocating pixel buffers
+    Image.MAX_IMAGE_PIXELS = 25_000_000
 except ImportError:
     PIL_AVAILABLE = False
-    print("Warning: PIL not available. Avatar upload will work but without optimization.")
+    app.logger.warning("PIL not available. Avatar upload will work but without optimization.")
 
-# Configuration for file uploads
-UPLOAD_FOLDER = 'static/uploads/avatars'
-ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
+# Background workers for avatar decoding/resizing
+avatar_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='avatar')
 
-# Create upload directory if it doesn't exist
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-os.makedirs('static/images', exist_ok=True)
+# How long an upload's processing state stays queryable (seconds)
+AVATAR_STATUS_SECONDS = 300
 
-def allowed_file(filename):
-    """Check if file extension is allowed"""
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+# An upload not seen as done after this long is reported as failed (seconds);
+# kept below the profile page's 30 s polling window
+AVATAR_MAX_PROCESSING_SECONDS = 20
+
+def _avatar_status_key(filename):
+    """Cache key holding the processing state of one avatar upload"""
+    return f"avatar_status:{filename}"
+
+def _set_avatar_status(filename, status, message=None):
+    """Record an upload's state ('processing', 'done' or 'failed') for the status endpoint"""
+    cache.set(_avatar_status_key(filename), {'status': status, 'message': message},
+              timeout=AVATAR_STATUS_SECONDS)
+
+# Magic-byte signatures of accepted avatar formats
+IMAGE_SIGNATURES = (
+    (b'\xff\xd8\xff', 'jpeg'),
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'GIF87a', 'gif'),
+    (b'GIF89a', 'gif'),
+)
+
+def detect_image_type(stream):
+    """Identify an uploaded image from its header bytes without decoding it"""
+    header = stream.read(12)
+    stream.seek(0)
+    
+    for signature, kind in IMAGE_SIGNATURES:
+        if header.startswith(signature):
+            return kind
+    
+    if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+        return 'webp'
+    
+    return None
+
+# Column names of the users table, probed once per process (optional profile
+# columns only exist after running database/complet_schema.sql)
+USERS_COLUMNS = None
+
+# Columns read by the profile page and login (optional ones are skipped if missing)
+PROFILE_COLUMNS = (
+    'id', 'username', 'email', 'created_at', 'phone', 'profile_picture',
+    'favorite_stocks', 'default_exchange', 'language', 'timezone',
+    'theme', 'chart_style', 'email_predictions', 'email_price_alerts',
+    'email_market_news', 'email_weekly_report'
+)
+LOGIN_COLUMNS = ('id', 'username', 'email', 'password', 'is_admin')
+
+def users_has_column(cursor, column):
+    """Check if the users table has a column, using the cached schema probe"""
+    global USERS_COLUMNS
+    if USERS_COLUMNS is None:
+        cursor.execute("SHOW COLUMNS FROM users")
+        USERS_COLUMNS = frozenset(
+            row['Field'] if isinstance(row, dict) else row[0]
+            for row in cursor.fetchall()
+        )
+    return column in USERS_COLUMNS
+
+def users_select_list(cursor, columns):
+    """Build a SELECT column list from the given users columns that exist"""
+    return ', '.join(column for column in columns if users_has_column(cursor, column))
 
 # ============================================================================
 # PROFILE & SETTINGS ROUTES
 # ============================================================================
 
+@cache.memoize(timeout=60)
+def _get_user_row(user_id):
+    """Fetch a user's row (cached per user, invalidated on profile writes)"""
+    with db_cursor() as cursor:
+        cursor.execute(
+            f"SELECT {users_select_list(cursor, PROFILE_COLUMNS)} FROM users WHERE id = %s",
+            (user_id,)
+        )
+        return cursor.fetchone()
+
+@cache.memoize(timeout=60)
+def _get_user_stats(user_id):
+    """Count a user's predictions and watchlist entries in one round trip (cached per user)"""
+    with db_cursor() as cursor:
+        cursor.execute("""
+            SELECT (SELECT COUNT(*) FROM predictions WHERE user_id = %s) AS predictions,
+                   (SELECT COUNT(*) FROM watchlist WHERE user_id = %s) AS watchlist
+        """, (user_id, user_id))
+        row = cursor.fetchone()
+    
+    return {
+        'predictions': row['predictions'],
+        'watchlist': row['watchlist']
+    }
+
 @app.route('/profile')
 def profile():
     """User profile and settings page"""
@@ -73,56 +239,38 @@ def profile():
         flash('Please login first!', 'warning')
         return redirect(url_for('login'))
     
-    conn = get_db_connection()
-    if not conn:
-        flash('Database connection error!', 'danger')
-        return redirect(url_for('dashboard'))
-    
-    cursor = conn.cursor(dictionary=True)
-    
     try:
         # Get user data
-        cursor.execute("SELECT * FROM users WHERE id = %s", (session['user_id'],))
-        user_data = cursor.fetchone()
+        user_data = _get_user_row(session['user_id'])
         
         if not user_data:
             flash('User not found!', 'danger')
             return redirect(url_for('dashboard'))
         
-        # Get prediction count
-        cursor.execute("SELECT COUNT(*) as count FROM predictions WHERE user_id = %s", (session['user_id'],))
-        prediction_count = cursor.fetchone()['count']
+        # Work on a copy so the cached row is never mutated
+        user_data = dict(user_data)
         
-        # Get watchlist count
-        cursor.execute("SELECT COUNT(*) as count FROM watchlist WHERE user_id = %s", (session['user_id'],))
-        watchlist_count = cursor.fetchone()['count']
-        
-        user_stats = {
-            'predictions': prediction_count,
-            'watchlist': watchlist_count
-        }
+        user_stats = _get_user_stats(session['user_id'])
         
         # Parse JSON fields safely
         if user_data.get('favorite_stocks'):
             try:
-                user_data['favorite_stocks'] = json.loads(user_data['favorite_stocks'])
-            except:
+                user_data['favorite_stocks'] = orjson.loads(user_data['favorite_stocks'])
+            except orjson.JSONDecodeError:
                 user_data['favorite_stocks'] = []
         else:
             user_data['favorite_stocks'] = []
         
         return render_template('profile.html', user=user_data, user_stats=user_stats)
     
-    except Exception as e:
-        print(f"Profile error: {e}")
-        import traceback
-        traceback.print_exc()
-        flash('Error loading profile!', 'danger')
+    except ConnectionError:
+        flash('Database connection error!', 'danger')
         return redirect(url_for('dashboard'))
     
-    finally:
-        cursor.close()
-        conn.close()
+    except Exception:
+        app.logger.exception("Profile error")
+        flash('Error loading profile!', 'danger')
+        return redirect(url_for('dashboard'))
 
 @app.route('/update-profile', methods=['POST'])
 def update_profile():
@@ -139,32 +287,34 @@ def update_profile():
         flash('Username and email are required!', 'danger')
         return redirect(url_for('profile'))
     
-    conn = get_db_connection()
-    if not conn:
-        flash('Database connection error!', 'danger')
-        return redirect(url_for('profile'))
-    
-    cursor = conn.cursor(dictionary=True)
-    
     try:
-        # Check if email is already taken by another user
-        cursor.execute(
-            "SELECT id FROM users WHERE email = %s AND id != %s",
-            (email, session['user_id'])
-        )
-        
-        if cursor.fetchone():
-            flash('Email already in use by another account!', 'danger')
-            return redirect(url_for('profile'))
-        
-        # Update user profile
-        cursor.execute("""
-            UPDATE users 
-            SET username = %s, email = %s, phone = %s
-            WHERE id = %s
-        """, (username, email, phone if phone else None, session['user_id']))
+        with db_cursor() as cursor:
+            # Update user profile unless the email is taken by another user
+            # (derived table lets MySQL reference users in its own UPDATE)
+            cursor.execute("""
+                UPDATE users 
+                SET username = %s, email = %s, phone = %s
+                WHERE id = %s
+                  AND NOT EXISTS (
+                      SELECT 1 FROM (
+                          SELECT id FROM users WHERE email = %s AND id != %s
+                      ) AS taken
+                  )
+            """, (username, email, phone if phone else None, session['user_id'],
+                  email, session['user_id']))
+            
+            if cursor.rowcount == 0:
+                # Nothing changed - either the email is taken or the values are identical
+                cursor.execute(
+                    "SELECT 1 FROM users WHERE email = %s AND id != %s LIMIT 1",
+                    (email, session['user_id'])
+                )
+                
+                if cursor.fetchone():
+                    flash('Email already in use by another account!', 'danger')
+                    return redirect(url_for('profile'))
         
-        conn.commit()
+        cache.delete_memoized(_get_user_row, session['user_id'])
         
         # Update session
         session['username'] = username
@@ -173,14 +323,14 @@ def update_profile():
         flash('✅ Profile updated successfully!', 'success')
         return redirect(url_for('profile'))
     
-    except Exception as e:
-        print(f"Error updating profile: {e}")
-        flash('Error updating profile!', 'danger')
+    except ConnectionError:
+        flash('Database connection error!', 'danger')
         return redirect(url_for('profile'))
     
-    finally:
-        cursor.close()
-        conn.close()
+    except Exception:
+        app.logger.exception("Error updating profile")
+        flash('Error updating profile!', 'danger')
+        return redirect(url_for('profile'))
 
 @app.route('/update-preferences', methods=['POST'])
 def update_preferences():
@@ -196,50 +346,39 @@ def update_preferences():
     
     # Validate JSON
     try:
-        json.loads(favorite_stocks)
-    except:
+        orjson.loads(favorite_stocks)
+    except orjson.JSONDecodeError:
         favorite_stocks = '[]'
     
-    conn = get_db_connection()
-    if not conn:
-        flash('Database connection error!', 'danger')
-        return redirect(url_for('profile'))
-    
-    cursor = conn.cursor()
-    
     try:
-        # Check if columns exist, if not use basic update
-        cursor.execute("SHOW COLUMNS FROM users LIKE 'favorite_stocks'")
-        has_columns = cursor.fetchone()
-        
-        if has_columns:
-            cursor.execute("""
-                UPDATE users 
-                SET favorite_stocks = %s, 
-                    default_exchange = %s,
-                    language = %s,
-                    timezone = %s
-                WHERE id = %s
-            """, (favorite_stocks, default_exchange, language, timezone, session['user_id']))
-        else:
-            print("Warning: Profile columns don't exist. Please run the SQL schema update.")
-            flash('Please update database schema first!', 'warning')
-            return redirect(url_for('profile'))
+        with db_cursor(dictionary=False) as cursor:
+            # Check if columns exist, if not use basic update
+            if users_has_column(cursor, 'favorite_stocks'):
+                cursor.execute("""
+                    UPDATE users 
+                    SET favorite_stocks = %s, 
+                        default_exchange = %s,
+                        language = %s,
+                        timezone = %s
+                    WHERE id = %s
+                """, (favorite_stocks, default_exchange, language, timezone, session['user_id']))
+            else:
+                app.logger.warning("Profile columns don't exist. Please run the SQL schema update.")
+                flash('Please update database schema first!', 'warning')
+                return redirect(url_for('profile'))
         
-        conn.commit()
+        cache.delete_memoized(_get_user_row, session['user_id'])
         flash('✅ Preferences updated successfully!', 'success')
         return redirect(url_for('profile'))
     
-    except Exception as e:
-        print(f"Error updating preferences: {e}")
-        import traceback
-        traceback.print_exc()
-        flash('Error updating preferences!', 'danger')
+    except ConnectionError:
+        flash('Database connection error!', 'danger')
         return redirect(url_for('profile'))
     
-    finally:
-        cursor.close()
-        conn.close()
+    except Exception:
+        app.logger.exception("Error updating preferences")
+        flash('Error updating preferences!', 'danger')
+        return redirect(url_for('profile'))
 
 @app.route('/update-appearance', methods=['POST'])
 def update_appearance():
@@ -251,41 +390,32 @@ def update_appearance():
     theme = request.form.get('theme', 'light')
     chart_style = request.form.get('chart_style', 'line')
     
-    conn = get_db_connection()
-    if not conn:
-        flash('Database connection error!', 'danger')
-        return redirect(url_for('profile'))
-    
-    cursor = conn.cursor()
-    
     try:
-        # Check if columns exist
-        cursor.execute("SHOW COLUMNS FROM users LIKE 'theme'")
-        has_columns = cursor.fetchone()
-        
-        if has_columns:
-            cursor.execute("""
-                UPDATE users 
-                SET theme = %s, chart_style = %s
-                WHERE id = %s
-            """, (theme, chart_style, session['user_id']))
-        else:
-            print("Warning: Appearance columns don't exist. Please run the SQL schema update.")
-            flash('Please update database schema first!', 'warning')
-            return redirect(url_for('profile'))
+        with db_cursor(dictionary=False) as cursor:
+            # Check if columns exist
+            if users_has_column(cursor, 'theme'):
+                cursor.execute("""
+                    UPDATE users 
+                    SET theme = %s, chart_style = %s
+                    WHERE id = %s
+                """, (theme, chart_style, session['user_id']))
+            else:
+                app.logger.warning("Appearance columns don't exist. Please run the SQL schema update.")
+                flash('Please update database schema first!', 'warning')
+                return redirect(url_for('profile'))
         
-        conn.commit()
+        cache.delete_memoized(_get_user_row, session['user_id'])
         flash('✅ Appearance settings updated!', 'success')
         return redirect(url_for('profile'))
     
-    except Exception as e:
-        print(f"Error updating appearance: {e}")
-        flash('Error updating appearance!', 'danger')
+    except ConnectionError:
+        flash('Database connection error!', 'danger')
         return redirect(url_for('profile'))
     
-    finally:
-        cursor.close()
-        conn.close()
+    except Exception:
+        app.logger.exception("Error updating appearance")
+        flash('Error updating appearance!', 'danger')
+        return redirect(url_for('profile'))
 
 @app.route('/change-password', methods=['POST'])
 def change_password():
@@ -310,41 +440,36 @@ def change_password():
         flash('Password must be at least 8 characters long!', 'danger')
         return redirect(url_for('profile'))
     
-    conn = get_db_connection()
-    if not conn:
-        flash('Database connection error!', 'danger')
-        return redirect(url_for('profile'))
-    
-    cursor = conn.cursor(dictionary=True)
-    
     try:
-        # Verify current password
-        cursor.execute("SELECT password FROM users WHERE id = %s", (session['user_id'],))
-        user = cursor.fetchone()
+        with db_cursor() as cursor:
+            cursor.execute("SELECT password FROM users WHERE id = %s", (session['user_id'],))
+            user = cursor.fetchone()
         
-        if not user or not check_password_hash(user['password'], current_password):
+        # Verify current password (hashing runs without holding a pooled connection)
+        if not user or not verify_password(user['password'], current_password):
             flash('Current password is incorrect!', 'danger')
             return redirect(url_for('profile'))
         
         # Update password
-        hashed_password = generate_password_hash(new_password, method='pbkdf2:sha256')
-        cursor.execute(
-            "UPDATE users SET password = %s WHERE id = %s",
-            (hashed_password, session['user_id'])
-        )
+        hashed_password = hash_password(new_password)
+        with db_cursor() as cursor:
+            cursor.execute(
+                "UPDATE users SET password = %s WHERE id = %s",
+                (hashed_password, session['user_id'])
+            )
         
-        conn.commit()
+        cache.delete_memoized(_get_user_row, session['user_id'])
         flash('✅ Password changed successfully!', 'success')
         return redirect(url_for('profile'))
     
-    except Exception as e:
-        print(f"Error changing password: {e}")
-        flash('Error changing password!', 'danger')
+    except ConnectionError:
+        flash('Database connection error!', 'danger')
         return redirect(url_for('profile'))
     
-    finally:
-        cursor.close()
-        conn.close()
+    except Exception:
+        app.logger.exception("Error changing password")
+        flash('Error changing password!', 'danger')
+        return redirect(url_for('profile'))
 
 @app.route('/update-notifications', methods=['POST'])
 def update_notifications():
@@ -358,51 +483,106 @@ def update_notifications():
     email_market_news = 'email_market_news' in request.form
     email_weekly_report = 'email_weekly_report' in request.form
     
-    conn = get_db_connection()
-    if not conn:
+    try:
+        with db_cursor(dictionary=False) as cursor:
+            # Check if columns exist
+            if users_has_column(cursor, 'email_predictions'):
+                cursor.execute("""
+                    UPDATE users 
+                    SET email_predictions = %s,
+                        email_price_alerts = %s,
+                        email_market_news = %s,
+                        email_weekly_report = %s
+                    WHERE id = %s
+                """, (email_predictions, email_price_alerts, email_market_news, 
+                      email_weekly_report, session['user_id']))
+            else:
+                flash('Please update database schema first!', 'warning')
+                return redirect(url_for('profile'))
+        
+        cache.delete_memoized(_get_user_row, session['user_id'])
+        flash('✅ Notification preferences updated!', 'success')
+        return redirect(url_for('profile'))
+    
+    except ConnectionError:
         flash('Database connection error!', 'danger')
         return redirect(url_for('profile'))
     
-    cursor = conn.cursor()
+    except Exception:
+        app.logger.exception("Error updating notifications")
+        flash('Error updating notification preferences!', 'danger')
+        return redirect(url_for('profile'))
+
+def process_avatar(user_id, raw_bytes, filename):
+    """
+    Resize, save and record an uploaded avatar (runs on the avatar executor)
     
+    Parameters:
+    - user_id: Owner of the avatar
+    - raw_bytes: Uploaded file contents (already validated as an image)
+    - filename: Target filename inside UPLOAD_FOLDER
+    """
     try:
-        # Check if columns exist
-        cursor.execute("SHOW COLUMNS FROM users LIKE 'email_predictions'")
-        has_columns = cursor.fetchone()
+        filepath = os.path.join(UPLOAD_FOLDER, filename)
         
-        if has_columns:
-            cursor.execute("""
-                UPDATE users 
-                SET email_predictions = %s,
-                    email_price_alerts = %s,
-                    email_market_news = %s,
-                    email_weekly_report = %s
-                WHERE id = %s
-            """, (email_predictions, email_price_alerts, email_market_news, 
-                  email_weekly_report, session['user_id']))
+        # Save file
+        if PIL_AVAILABLE:
+            # Open and optimize image with PIL
+            with Image.open(io.BytesIO(raw_bytes)) as img:
+                # Let libjpeg decode at a reduced scale (no-op for PNG/GIF)
+                img.draft('RGB', (400, 400))
+                img.load()
+                
+                # Convert to RGB if necessary
+                if img.mode in ('RGBA', 'LA', 'P'):
+                    background = Image.new('RGB', img.size, (255, 255, 255))
+                    if img.mode == 'P':
+                        img = img.convert('RGBA')
+                    background.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
+                    img = background
+                
+                # Resize to 400x400 maintaining aspect ratio
+                img.thumbnail((400, 400), Image.Resampling.LANCZOS)
+                
+                # Save optimized image
+                img.save(filepath, 'JPEG', quality=85, optimize=True, progressive=True)
         else:
-            flash('Please update database schema first!', 'warning')
-            return redirect(url_for('profile'))
+            # Simple save without optimization
+            with open(filepath, 'wb') as f:
+                f.write(raw_bytes)
         
-        conn.commit()
-        flash('✅ Notification preferences updated!', 'success')
-        return redirect(url_for('profile'))
-    
-    except Exception as e:
-        print(f"Error updating notifications: {e}")
-        flash('Error updating notification preferences!', 'danger')
-        return redirect(url_for('profile'))
+        # Update database
+        with db_cursor(dictionary=False) as cursor:
+            # Check if column exists
+            if not users_has_column(cursor, 'profile_picture'):
+                app.logger.warning("profile_picture column doesn't exist")
+                _set_avatar_status(filename, 'failed', 'Profile pictures are not enabled')
+                return
+            
+            cursor.execute(
+                "UPDATE users SET profile_picture = %s WHERE id = %s",
+                (f"uploads/avatars/{filename}", user_id)
+            )
+        
+        with app.app_context():
+            cache.delete_memoized(_get_user_row, user_id)
+        
+        _set_avatar_status(filename, 'done')
     
-    finally:
-        cursor.close()
-        conn.close()
+    except Exception:
+        app.logger.exception("Error processing avatar for user %s", user_id)
+        _set_avatar_status(filename, 'failed', 'Could not process the image')
 
 @app.route('/upload-avatar', methods=['POST'])
 def upload_avatar():
-    """Upload profile picture"""
+    """Upload profile picture (image processing continues in the background)"""
     if 'user_id' not in session:
         return jsonify({'success': False, 'message': 'Please login first'})
     
+    # Reject oversized uploads before the body is parsed
+    if request.content_length and request.content_length > app.config['MAX_CONTENT_LENGTH']:
+        return jsonify({'success': False, 'message': 'File too large. Maximum size is 5MB'})
+    
     if 'avatar' not in request.files:
         return jsonify({'success': False, 'message': 'No file uploaded'})
     
@@ -414,70 +594,79 @@ def upload_avatar():
     if not allowed_file(file.filename):
         return jsonify({'success': False, 'message': 'Invalid file type. Use PNG, JPG, or GIF'})
     
+    # Verify the content really is an image before handing it to PIL
+    if detect_image_type(file.stream) is None:
+        return jsonify({'success': False, 'message': 'Invalid image file'})
+    
     try:
-        # Generate unique filename
+        # Generate unique filename (user_id is an int and ext is whitelisted,
+        # so the name is already safe without secure_filename)
         ext = file.filename.rsplit('.', 1)[1].lower()
-        filename = secure_filename(f"user_{session['user_id']}_{int(datetime.now().timestamp())}.{ext}")
-        filepath = os.path.join(UPLOAD_FOLDER, filename)
-        
-        # Save file
-        if PIL_AVAILABLE:
-            # Open and optimize image with PIL
-            img = Image.open(file)
-            
-            # Convert to RGB if necessary
-            if img.mode in ('RGBA', 'LA', 'P'):
-                background = Image.new('RGB', img.size, (255, 255, 255))
-                if img.mode == 'P':
-                    img = img.convert('RGBA')
-                background.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
-                img = background
-            
-            # Resize to 400x400 maintaining aspect ratio
-            img.thumbnail((400, 400), Image.Resampling.LANCZOS)
-            
-            # Save optimized image
-            img.save(filepath, 'JPEG', quality=85, optimize=True)
-        else:
-            # Simple save without optimization
-            file.save(filepath)
-        
-        # Update database
-        conn = get_db_connection()
-        if not conn:
-            return jsonify({'success': False, 'message': 'Database error'})
-        
-        cursor = conn.cursor()
-        
-        profile_picture_path = f"uploads/avatars/{filename}"
-        
-        # Check if column exists
-        cursor.execute("SHOW COLUMNS FROM users LIKE 'profile_picture'")
-        has_column = cursor.fetchone()
-        
-        if has_column:
-            cursor.execute(
-                "UPDATE users SET profile_picture = %s WHERE id = %s",
-                (profile_picture_path, session['user_id'])
-            )
-            conn.commit()
-        else:
-            print("Warning: profile_picture column doesn't exist")
+        filename = f"user_{session['user_id']}_{time.time_ns()}.{ext}"
         
-        cursor.close()
-        conn.close()
+        # Hand decoding/resizing off so this worker can serve other requests;
+        # the client polls status_url until processing has finished
+        _set_avatar_status(filename, 'processing')
+        avatar_executor.submit(process_avatar, session['user_id'], file.read(), filename)
         
         return jsonify({
-            'success': True, 
-            'message': 'Profile picture updated successfully!',
-            'url': url_for('static', filename=profile_picture_path)
-        })
+            'status': 'processing',
+            'message': 'Profile picture is being processed',
+            'status_url': url_for('avatar_status', filename=filename)
+        }), 202
     
     except Exception as e:
-        print(f"Error uploading avatar: {e}")
-        import traceback
-        traceback.print_exc()
+        app.logger.exception("Error uploading avatar")
         return jsonify({'success': False, 'message': f'Upload failed: {str(e)}'})
+
+@app.route('/upload-avatar/status/<filename>')
+def avatar_status(filename):
+    """Report whether a background avatar upload has finished"""
+    if 'user_id' not in session:
+        return jsonify({'success': False, 'message': 'Please login first'})
+    
+    # Users can only query their own uploads (user_<id>_<time_ns>.<ext>)
+    if not re.fullmatch(rf"user_{session['user_id']}_\d+\.\w+", filename):
+        return jsonify({'success': False, 'message': 'Upload not found'}), 404
+    
+    state = cache.get(_avatar_status_key(filename))
+    
+    if state is None:
+        # Not recorded in this worker's cache (e.g. SimpleCache with several
+        # workers): the user's row says whether this upload was saved
+        try:
+            with db_cursor() as cursor:
+                if users_has_column(cursor, 'profile_picture'):
+                    cursor.execute("SELECT profile_picture FROM users WHERE id = %s",
+                                   (session['user_id'],))
+                    row = cursor.fetchone()
+                    if row and row['profile_picture'] == f"uploads/avatars/{filename}":
+                        state = {'status': 'done', 'message': None}
+        except Exception:
+            app.logger.exception("Error checking avatar status")
+        
+        if state is None:
+            state = {'status': 'processing', 'message': None}
+    
+    # A failure recorded in another worker's cache is invisible here, so past
+    # the job's maximum age report a terminal state instead of waiting forever
+    uploaded_ns = int(filename.rsplit('.', 1)[0].rsplit('_', 1)[1])
+    if (state['status'] == 'processing'
+            and time.time_ns() - uploaded_ns > AVATAR_MAX_PROCESSING_SECONDS * 1_000_000_000):
+        state = {'status': 'failed', 'message': 'Could not confirm the upload, please try again'}
+    
+    if state['status'] == 'done':
+        return jsonify({
+            'success': True,
+            'status': 'done',
+            'message': 'Profile picture updated',
+            'url': url_for('static', filename=f"uploads/avatars/{filename}")
+        })
+    
+    if state['status'] == 'failed':
+        return jsonify({'success': False, 'status': 'failed', 'message': state['message']})
+    
+    return jsonify({'status': 'processing', 'message': 'Profile picture is being processed'}), 202
     
 # ============================================================================
 # HOME & AUTHENTICATION ROUTES
@@ -499,42 +688,37 @@ def register():
         password = request.form['password']
         
         # Hash password for security
-        hashed_password = generate_password_hash(password, method='pbkdf2:sha256')
-        
-        conn = get_db_connection()
-        if not conn:
-            flash('Database connection error!', 'danger')
-            return redirect(url_for('register'))
-        
-        cursor = conn.cursor()
+        hashed_password = hash_password(password)
         
         try:
-            # Check if user already exists
-            cursor.execute("SELECT * FROM users WHERE email = %s", (email,))
-            if cursor.fetchone():
-                flash('Email already registered!', 'danger')
-                return redirect(url_for('register'))
+            with db_cursor(dictionary=False) as cursor:
+                # Check if user already exists
+                cursor.execute("SELECT 1 FROM users WHERE email = %s LIMIT 1", (email,))
+                if cursor.fetchone():
+                    flash('Email already registered!', 'danger')
+                    return redirect(url_for('register'))
+                
+                # Insert new user
+                cursor.execute(
+                    "INSERT INTO users (username, email, password) VALUES (%s, %s, %s)",
+                    (username, email, hashed_password)
+                )
             
-            # Insert new user
-            cursor.execute(
-                "INSERT INTO users (username, email, password) VALUES (%s, %s, %s)",
-                (username, email, hashed_password)
-            )
-            conn.commit()
             flash('Registration successful! Please login.', 'success')
             return redirect(url_for('login'))
         
+        except ConnectionError:
+            flash('Database connection error!', 'danger')
+            return redirect(url_for('register'))
+        
         except Exception as e:
             flash(f'Error during registration: {str(e)}', 'danger')
             return redirect(url_for('register'))
-        
-        finally:
-            cursor.close()
-            conn.close()
     
     return render_template('register.html')
 
 @app.route('/login', methods=['GET', 'POST'])
+@limiter.limit('10/minute', methods=['POST'])
 def login():
     """User login route"""
     if request.method == 'POST':
@@ -545,20 +729,27 @@ def login():
             flash('Please enter both email and password!', 'danger')
             return redirect(url_for('login'))
         
-        conn = get_db_connection()
-        if not conn:
-            flash('Database connection error. Please try again.', 'danger')
-            return redirect(url_for('login'))
-        
-        cursor = conn.cursor(dictionary=True)
-        
         try:
-            cursor.execute("SELECT * FROM users WHERE email = %s", (email,))
-            user = cursor.fetchone()
+            with db_cursor() as cursor:
+                cursor.execute(
+                    f"SELECT {users_select_list(cursor, LOGIN_COLUMNS)} FROM users WHERE email = %s",
+                    (email,)
+                )
+                user = cursor.fetchone()
             
+            # Password hashing runs after the connection is back in the pool
             if user:
                 # Check if password matches
-                if check_password_hash(user['password'], password):
+                if verify_password(user['password'], password):
+                    # Upgrade legacy pbkdf2 hashes to argon2 on successful login
+                    if needs_rehash(user['password']):
+                        new_hash = hash_password(password)
+                        with db_cursor() as cursor:
+                            cursor.execute(
+                                "UPDATE users SET password = %s WHERE id = %s",
+                                (new_hash, user['id'])
+                            )
+                    
                     session['user_id'] = user['id']
                     session['username'] = user['username']
                     session['email'] = user['email']
@@ -568,15 +759,17 @@ def login():
                 else:
                     flash('Invalid email or password!', 'danger')
             else:
+                # Spend the same hashing time as a real check to avoid leaking which emails exist
+                verify_password(DUMMY_PASSWORD_HASH, password)
                 flash('Invalid email or password!', 'danger')
         
-        except Exception as e:
-            print(f"Login error: {e}")
-            flash('An error occurred during login. Please try again.', 'danger')
+        except ConnectionError:
+            flash('Database connection error. Please try again.', 'danger')
+            return redirect(url_for('login'))
         
-        finally:
-            cursor.close()
-            conn.close()
+        except Exception:
+            app.logger.exception("Login error")
+            flash('An error occurred during login. Please try again.', 'danger')
     
     return render_template('login.html')
 
@@ -592,7 +785,37 @@ def logout():
 # REAL-TIME PRICE API ROUTES
 # ============================================================================
 
-@app.route('/api/stock-price/<stock_symbol>')
+# ticker.info is the slowest yfinance call; quote fields are reused for a minute
+@cache.memoize(timeout=60)
+def get_ticker_info(stock_symbol):
+    """Cached wrapper around yf.Ticker(stock_symbol).info"""
+    return yf.Ticker(stock_symbol).info
+
+def stock_name_from_info(info, stock_symbol):
+    """Pick a display name from ticker info (long name, short name or bare symbol)"""
+    stock_name = info.get('longName', stock_symbol)
+    if not stock_name or stock_name == stock_symbol:
+        stock_name = info.get('shortName', stock_symbol.replace('.NS', '').replace('.BO', ''))
+    return stock_name
+
+# Company names practically never change, so keep them for a day
+@cache.memoize(timeout=86400)
+def get_stock_name(stock_symbol):
+    """Get a display name for a stock, preferring the cheap quoteType lookup over ticker.info"""
+    return fetch_quote_type_name(stock_symbol) or stock_name_from_info(get_ticker_info(stock_symbol), stock_symbol)
+
+# Short-lived response caching for polled endpoints (?nocache=1 bypasses it)
+def skip_response_cache():
+    """Let clients bypass the response cache with ?nocache=1"""
+    return request.args.get('nocache') == '1'
+
+def is_success_response(response):
+    """Only cache API responses that actually carry data"""
+    payload = response.get_json(silent=True)
+    return bool(payload and payload.get('success'))
+
+@app.route('/api/stock-price/<symbol:stock_symbol>')
+@cache.cached(timeout=10, unless=skip_response_cache, response_filter=is_success_response)
 def api_stock_price(stock_symbol):
     """
     Get real-time stock price data with intraday chart
@@ -607,12 +830,11 @@ def api_stock_price(stock_symbol):
     try:
         ticker = yf.Ticker(stock_symbol)
         
-        # Get current data
-        info = ticker.info
-        history = ticker.history(period='1d', interval='1m')
+        # Get current data (two sessions, so the previous close comes from the same call)
+        history = ticker.history(period='2d', interval='1m')
         
         if history.empty:
-            # Try with longer period if 1d is empty
+            # Try with longer period if 2d is empty
             history = ticker.history(period='5d', interval='5m')
         
         if history.empty:
@@ -621,113 +843,182 @@ def api_stock_price(stock_symbol):
                 'message': f'No data available for {stock_symbol}'
             })
         
+        # Split the latest session from the earlier ones
+        sessions = history.index.normalize()
+        latest_session = sessions == sessions[-1]
+        earlier_closes = history.loc[~latest_session, 'Close'].dropna()
+        history = history[latest_session]
+        
+        # Pull OHLC out once as a float array (columns: Open, High, Low, Close)
+        ohlc = history[['Open', 'High', 'Low', 'Close']].to_numpy(dtype='float64')
+        
         # Get current price (last available)
-        current_price = history['Close'].iloc[-1]
+        current_price = ohlc[-1, 3]
         
-        # Get previous close
-        previous_close = info.get('previousClose', current_price)
+        # Get previous close (ticker info only if no earlier session was returned)
+        if not earlier_closes.empty:
+            previous_close = earlier_closes.iloc[-1]
+        else:
+            previous_close = get_ticker_info(stock_symbol).get('previousClose', current_price)
         
         # Calculate change
         change = current_price - previous_close
         change_percent = (change / previous_close * 100) if previous_close else 0
         
-        # Get day high and low
-        day_high = history['High'].max()
-        day_low = history['Low'].min()
-        day_open = history['Open'].iloc[0]
+        # Get day high and low (nan-aware, like pandas max/min)
+        day_high = np.nanmax(ohlc[:, 1])
+        day_low = np.nanmin(ohlc[:, 2])
+        day_open = ohlc[0, 0]
         
         # Get stock name
-        stock_name = info.get('longName', stock_symbol)
-        if not stock_name or stock_name == stock_symbol:
-            stock_name = info.get('shortName', stock_symbol.replace('.NS', '').replace('.BO', ''))
+        stock_name = get_stock_name(stock_symbol)
         
         # Check if market is open (IST timezone for Indian stocks)
         is_market_open = check_market_status(stock_symbol)
         
         # Prepare intraday data for chart (last 20 points)
-        intraday_data = []
-        for idx in history.index[-20:]:
-            intraday_data.append({
-                'time': idx.strftime('%H:%M'),
-                'price': float(history.loc[idx, 'Close'])
-            })
+        tail = history['Close'].tail(20)
+        times = tail.index.strftime('%H:%M').tolist()
+        prices = tail.to_numpy(dtype='float64').tolist()
+        intraday_data = [{'time': t, 'price': p} for t, p in zip(times, prices)]
         
         return jsonify({
             'success': True,
             'data': {
                 'symbol': stock_symbol,
                 'name': stock_name,
-                'price': float(current_price),
-                'change': float(change),
-                'changePercent': float(change_percent),
-                'high': float(day_high),
-                'low': float(day_low),
-                'open': float(day_open),
-                'previousClose': float(previous_close),
+                'price': current_price,
+                'change': change,
+                'changePercent': change_percent,
+                'high': day_high,
+                'low': day_low,
+                'open': day_open,
+                'previousClose': previous_close,
                 'isMarketOpen': is_market_open,
                 'intradayData': intraday_data,
-                'timestamp': datetime.now().isoformat()
+                'timestamp': datetime.now()
             }
         })
     
     except Exception as e:
-        print(f"Error fetching stock price for {stock_symbol}: {e}")
-        import traceback
-        traceback.print_exc()
+        app.logger.exception("Error fetching stock price for %s", stock_symbol)
         return jsonify({
             'success': False,
             'message': f'Error fetching data: {str(e)}'
         })
 
+# Exchange timezones, resolved once instead of on every status check
+IST = pytz.timezone('Asia/Kolkata')
+US_EASTERN = pytz.timezone('America/New_York')
+INDIAN_EXCHANGE_SUFFIXES = ('.NS', '.BO')
+
+# Trading hours per market as (timezone, open, close) in minutes since midnight
+MARKET_HOURS = {
+    'IN': (IST, 9 * 60 + 15, 15 * 60 + 30),        # NSE/BSE: 9:15 AM - 3:30 PM
+    'US': (US_EASTERN, 9 * 60 + 30, 16 * 60),      # NYSE/NASDAQ: 9:30 AM - 4:00 PM
+}
+
+# Market status is recomputed at most once per bucket per market
+MARKET_STATUS_BUCKET_SECONDS = 30
+
 def check_market_status(stock_symbol):
     """
     Check if market is currently open based on stock symbol
     
     Indian markets (NSE/BSE): 9:15 AM - 3:30 PM IST, Monday-Friday
     US markets: 9:30 AM - 4:00 PM EST, Monday-Friday
+    
+    The result is cached per market for up to MARKET_STATUS_BUCKET_SECONDS.
     """
+    # Determine market based on stock symbol
+    market = 'IN' if stock_symbol.endswith(INDIAN_EXCHANGE_SUFFIXES) else 'US'
+    return _market_status_cached(market, int(time.time() // MARKET_STATUS_BUCKET_SECONDS))
+
+@functools.lru_cache(maxsize=8)
+def _market_status_cached(market, time_bucket):
+    """Compute whether a market is open (time_bucket only rolls the cache key)"""
     try:
-        # Determine market based on stock symbol
-        if '.NS' in stock_symbol or '.BO' in stock_symbol:
-            # Indian market
-            tz = pytz.timezone('Asia/Kolkata')
-            now = datetime.now(tz)
-            
-            # Check if weekend
-            if now.weekday() >= 5:  # Saturday = 5, Sunday = 6
-                return False
-            
-            # Market hours: 9:15 AM - 3:30 PM
-            market_open = now.replace(hour=9, minute=15, second=0, microsecond=0)
-            market_close = now.replace(hour=15, minute=30, second=0, microsecond=0)
-            
-            return market_open <= now <= market_close
+        tz, open_minute, close_minute = MARKET_HOURS[market]
+        now = datetime.now(tz)
         
-        else:
-            # US market (default)
-            tz = pytz.timezone('America/New_York')
-            now = datetime.now(tz)
-            
-            # Check if weekend
-            if now.weekday() >= 5:
-                return False
-            
-            # Market hours: 9:30 AM - 4:00 PM EST
-            market_open = now.replace(hour=9, minute=30, second=0, microsecond=0)
-            market_close = now.replace(hour=16, minute=0, second=0, microsecond=0)
-            
-            return market_open <= now <= market_close
+        # Check if weekend
+        if now.weekday() >= 5:  # Saturday = 5, Sunday = 6
+            return False
+        
+        # Compare minutes since midnight instead of building datetimes
+        minute_of_day = now.hour * 60 + now.minute
+        return open_minute <= minute_of_day < close_minute
     
-    except Exception as e:
-        print(f"Error checking market status: {e}")
+    except Exception:
+        app.logger.exception("Error checking market status")
         return False
 
+def build_price_entry(symbol, quote):
+    """Turn a {'price', 'previousClose'} quote (or None) into a batch price entry"""
+    if quote is None:
+        return {
+            'success': False,
+            'message': 'No data available'
+        }
+    
+    change = quote['price'] - quote['previousClose']
+    change_percent = (change / quote['previousClose'] * 100) if quote['previousClose'] else 0
+    
+    return {
+        'success': True,
+        'price': quote['price'],
+        'change': change,
+        'changePercent': change_percent,
+        'isMarketOpen': check_market_status(symbol)
+    }
+
+def get_batch_prices(symbols):
+    """
+    Get price entries for many symbols (spark request first, one yf.download for the rest)
+    
+    Parameters:
+    - symbols: List of unique ticker symbols
+    
+    Returns:
+    - Dictionary {symbol: entry} in the same order as symbols
+    """
+    # One spark request covers up to 20 symbols
+    quotes = fetch_spark_quotes(symbols)
+    
+    # Anything spark missed comes from a single multi-ticker download
+    missing = [symbol for symbol in symbols if symbol not in quotes]
+    if missing:
+        quotes.update(fetch_download_quotes(missing))
+    
+    return {symbol: build_price_entry(symbol, quotes.get(symbol)) for symbol in symbols}
+
+def stream_batch_prices(symbols):
+    """Yield one NDJSON line per symbol as soon as its quote is available"""
+    wanted = set(symbols)
+    sent = set()
+    
+    for chunk_quotes in iter_spark_quotes(symbols):
+        for symbol, quote in chunk_quotes.items():
+            if symbol in wanted and symbol not in sent:
+                sent.add(symbol)
+                yield app.json.dumps({'symbol': symbol, **build_price_entry(symbol, quote)}) + '\n'
+    
+    # Anything spark missed comes from a single multi-ticker download
+    missing = [symbol for symbol in symbols if symbol not in sent]
+    if missing:
+        quotes = fetch_download_quotes(missing)
+        for symbol in missing:
+            yield app.json.dumps({'symbol': symbol, **build_price_entry(symbol, quotes.get(symbol))}) + '\n'
+
 @app.route('/api/stock-prices/batch', methods=['POST'])
 def api_batch_stock_prices():
     """
     Get prices for multiple stocks at once (more efficient)
     
     Request body: {"symbols": ["RELIANCE.NS", "TCS.NS", "INFY.NS"]}
+    
+    With ?stream=1 the response is NDJSON (application/x-ndjson): one
+    {"symbol": ..., ...entry} object per line, sent as each quote arrives.
     """
     try:
         data = request.get_json()
@@ -739,42 +1030,18 @@ def api_batch_stock_prices():
                 'message': 'No symbols provided'
             })
         
-        results = {}
+        # Drop duplicates, keeping request order
+        symbols = list(dict.fromkeys(symbols))
         
-        for symbol in symbols:
-            try:
-                ticker = yf.Ticker(symbol)
-                history = ticker.history(period='1d', interval='1m')
-                
-                if not history.empty:
-                    current_price = history['Close'].iloc[-1]
-                    previous_close = ticker.info.get('previousClose', current_price)
-                    change = current_price - previous_close
-                    change_percent = (change / previous_close * 100) if previous_close else 0
-                    
-                    results[symbol] = {
-                        'success': True,
-                        'price': float(current_price),
-                        'change': float(change),
-                        'changePercent': float(change_percent),
-                        'isMarketOpen': check_market_status(symbol)
-                    }
-                else:
-                    results[symbol] = {
-                        'success': False,
-                        'message': 'No data available'
-                    }
-            
-            except Exception as e:
-                results[symbol] = {
-                    'success': False,
-                    'message': str(e)
-                }
+        if request.args.get('stream') == '1':
+            return Response(stream_batch_prices(symbols), mimetype='application/x-ndjson')
+        
+        results = get_batch_prices(symbols)
         
         return jsonify({
             'success': True,
             'data': results,
-            'timestamp': datetime.now().isoformat()
+            'timestamp': datetime.now()
         })
     
     except Exception as e:
@@ -784,6 +1051,7 @@ def api_batch_stock_prices():
         })
 
 @app.route('/api/market-status')
+@cache.cached(timeout=30, unless=skip_response_cache, response_filter=is_success_response)
 def api_market_status():
     """
     Get current market status for different exchanges
@@ -793,8 +1061,7 @@ def api_market_status():
         bse_open = check_market_status('RELIANCE.BO')
         us_open = check_market_status('AAPL')
         
-        ist = pytz.timezone('Asia/Kolkata')
-        current_time_ist = datetime.now(ist)
+        current_time_ist = datetime.now(IST)
         
         return jsonify({
             'success': True,
@@ -818,7 +1085,7 @@ def api_market_status():
                     'timezone': 'America/New_York'
                 },
                 'currentTime': current_time_ist.strftime('%Y-%m-%d %H:%M:%S IST'),
-                'timestamp': datetime.now().isoformat()
+                'timestamp': datetime.now()
             }
         })
     
@@ -828,14 +1095,14 @@ def api_market_status():
             'message': str(e)
         })
 
-@app.route('/api/stock-quote/<stock_symbol>')
+@app.route('/api/stock-quote/<symbol:stock_symbol>')
 def api_stock_quote(stock_symbol):
     """
     Get detailed stock quote information
     """
     try:
         ticker = yf.Ticker(stock_symbol)
-        info = ticker.info
+        info = get_ticker_info(stock_symbol)
         history = ticker.history(period='1d')
         
         if history.empty:
@@ -849,7 +1116,7 @@ def api_stock_quote(stock_symbol):
         quote = {
             'symbol': stock_symbol,
             'name': info.get('longName', stock_symbol),
-            'price': float(current_price),
+            'price': current_price,
             'currency': info.get('currency', 'INR'),
             'marketCap': info.get('marketCap', 0),
             'volume': int(info.get('volume', 0)),
@@ -881,6 +1148,19 @@ def api_stock_quote(stock_symbol):
 # DASHBOARD & PREDICTION ROUTES
 # ============================================================================
 
+def parse_prediction_values(raw):
+    """Decode a stored predicted_values document (str or bytes), or None if invalid"""
+    try:
+        return orjson.loads(raw)
+    except orjson.JSONDecodeError:
+        pass
+    
+    # Metrics written by json.dumps may contain NaN, which only stdlib json accepts
+    try:
+        return json.loads(raw)
+    except ValueError:
+        return None
+
 @app.route('/dashboard')
 def dashboard():
     """User dashboard showing prediction history"""
@@ -888,38 +1168,30 @@ def dashboard():
         flash('Please login first!', 'warning')
         return redirect(url_for('login'))
     
-    conn = get_db_connection()
-    if not conn:
-        flash('Database connection error!', 'danger')
-        return render_template('dashboard.html', predictions=[])
-    
-    cursor = conn.cursor(dictionary=True)
-    
     try:
-        cursor.execute(
-            "SELECT * FROM predictions WHERE user_id = %s ORDER BY prediction_date DESC LIMIT 10",
-            (session['user_id'],)
-        )
-        predictions = cursor.fetchall()
+        with db_cursor() as cursor:
+            cursor.execute(
+                "SELECT id, stock_symbol, prediction_date, predicted_values FROM predictions "
+                "WHERE user_id = %s ORDER BY prediction_date DESC LIMIT 10",
+                (session['user_id'],)
+            )
+            predictions = cursor.fetchall()
         
         # Parse JSON data for each prediction
         for prediction in predictions:
             if prediction['predicted_values']:
-                try:
-                    prediction['parsed_data'] = json.loads(prediction['predicted_values'])
-                except:
-                    prediction['parsed_data'] = None
+                prediction['parsed_data'] = parse_prediction_values(prediction['predicted_values'])
         
         return render_template('dashboard.html', predictions=predictions)
     
-    except Exception as e:
-        print(f"Dashboard error: {e}")
-        flash('Error loading dashboard!', 'danger')
+    except ConnectionError:
+        flash('Database connection error!', 'danger')
         return render_template('dashboard.html', predictions=[])
     
-    finally:
-        cursor.close()
-        conn.close()
+    except Exception:
+        app.logger.exception("Dashboard error")
+        flash('Error loading dashboard!', 'danger')
+        return render_template('dashboard.html', predictions=[])
 
 @app.route('/predict', methods=['POST'])
 def predict():
@@ -932,7 +1204,7 @@ def predict():
     
     try:
         # Step 1: Fetch stock data
-        print(f"Fetching data for {stock_symbol}...")
+        app.logger.info("Fetching data for %s...", stock_symbol)
         stock_data = fetch_stock_data(stock_symbol)
         
         if stock_data is None or stock_data.empty:
@@ -940,30 +1212,30 @@ def predict():
             return redirect(url_for('dashboard'))
         
         # Step 2: Preprocess data
-        print("Preprocessing data...")
+        app.logger.info("Preprocessing data...")
         processed_data = preprocess_data(stock_data)
         
         # Step 3: Train models and predict
-        print("Training models and predicting...")
+        # (imported here so TensorFlow only loads when a prediction is requested)
+        app.logger.info("Training models and predicting...")
+        from model.train_model import train_and_predict
         result = train_and_predict(processed_data, stock_symbol)
         
         # Step 4: Save prediction to database
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
+        # (orjson serializes the numpy slice and metric scalars directly)
         prediction_data = {
             'best_model': result['best_model'],
-            'predictions': result['predictions'].tolist()[:10],
+            'predictions': result['predictions'][:10],
             'metrics': result['metrics']
         }
+        predicted_values = orjson.dumps(prediction_data, option=orjson.OPT_SERIALIZE_NUMPY).decode('utf-8')
         
-        cursor.execute(
-            "INSERT INTO predictions (user_id, stock_symbol, predicted_values) VALUES (%s, %s, %s)",
-            (session['user_id'], stock_symbol, json.dumps(prediction_data))
-        )
-        conn.commit()
-        cursor.close()
-        conn.close()
+        with db_cursor(dictionary=False) as cursor:
+            cursor.execute(
+                "INSERT INTO predictions (user_id, stock_symbol, predicted_values) VALUES (%s, %s, %s)",
+                (session['user_id'], stock_symbol, predicted_values)
+            )
+        cache.delete_memoized(_get_user_stats, session['user_id'])
         
         flash(f'Prediction successful for {stock_symbol}!', 'success')
         return render_template('result.html', 
@@ -972,7 +1244,7 @@ def predict():
                              plot_url=result['plot_path'])
     
     except Exception as e:
-        print(f"Prediction error: {e}")
+        app.logger.exception("Prediction error")
         flash(f'Error during prediction: {str(e)}', 'danger')
         return redirect(url_for('dashboard'))
 
@@ -980,23 +1252,34 @@ def predict():
 # NEWS & MARKET DATA ROUTES
 # ============================================================================
 
+# Market data is the same for every user, so one Yahoo fetch per timeout is shared
+@cache.memoize(timeout=60)
+def cached_all_news(limit=20):
+    """Cached wrapper around get_all_news()"""
+    return get_all_news(limit=limit)
+
+@cache.memoize(timeout=60)
+def cached_market_summary():
+    """Cached wrapper around get_market_summary()"""
+    return get_market_summary()
+
 @app.route('/news')
 def news():
     """Market news and updates page"""
     try:
         # Get comprehensive news data
-        print("Fetching news data...")
-        news_data = get_all_news(limit=20)
+        app.logger.info("Fetching news data...")
+        news_data = cached_all_news(limit=20)
         
         # Debug: Print what we got
-        print(f"Market summary: {len(news_data.get('market_summary', {}))} items")
-        print(f"Trending stocks: {len(news_data.get('trending_stocks', []))} items")
-        print(f"Market news: {len(news_data.get('market_news', []))} items")
-        print(f"Economic calendar: {len(news_data.get('economic_calendar', []))} items")
+        app.logger.info("Market summary: %d items", len(news_data.get('market_summary', {})))
+        app.logger.info("Trending stocks: %d items", len(news_data.get('trending_stocks', [])))
+        app.logger.info("Market news: %d items", len(news_data.get('market_news', [])))
+        app.logger.info("Economic calendar: %d items", len(news_data.get('economic_calendar', [])))
         
         # Ensure we have at least some data
         if not news_data.get('market_news'):
-            print("No market news found, using placeholder data")
+            app.logger.info("No market news found, using placeholder data")
             from utils.news_fetcher import get_placeholder_news
             news_data['market_news'] = get_placeholder_news()
         
@@ -1006,10 +1289,8 @@ def news():
                              market_news=news_data.get('market_news', []),
                              economic_calendar=news_data.get('economic_calendar', []))
     
-    except Exception as e:
-        print(f"Error loading news: {e}")
-        import traceback
-        traceback.print_exc()
+    except Exception:
+        app.logger.exception("Error loading news")
         
         # Provide fallback data
         from utils.news_fetcher import get_placeholder_news
@@ -1019,7 +1300,7 @@ def news():
                              market_news=get_placeholder_news(),
                              economic_calendar=[])
 
-@app.route('/api/stock-news/<stock_symbol>')
+@app.route('/api/stock-news/<symbol:stock_symbol>')
 def api_stock_news(stock_symbol):
     """API endpoint to get news for specific stock"""
     try:
@@ -1030,10 +1311,11 @@ def api_stock_news(stock_symbol):
         return jsonify({'success': False, 'error': str(e)})
 
 @app.route('/api/market-summary')
+@cache.cached(timeout=60, unless=skip_response_cache, response_filter=is_success_response)
 def api_market_summary():
     """API endpoint to get market summary"""
     try:
-        summary = get_market_summary()
+        summary = cached_market_summary()
         return jsonify({'success': True, 'data': summary})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
@@ -1042,6 +1324,13 @@ def api_market_summary():
 # ADMIN ROUTES
 # ============================================================================
 
+@cache.memoize(timeout=60)
+def _count_all_predictions():
+    """Total number of predictions (cached, the admin panel doesn't need it exact)"""
+    with db_cursor() as cursor:
+        cursor.execute("SELECT COUNT(*) as total FROM predictions")
+        return cursor.fetchone()['total']
+
 @app.route('/admin')
 def admin():
     """Admin dashboard to view all users and predictions - Admin only"""
@@ -1049,54 +1338,46 @@ def admin():
         flash('Please login first!', 'warning')
         return redirect(url_for('login'))
     
-    # Check if user is admin
-    conn = get_db_connection()
-    if not conn:
-        flash('Database connection error!', 'danger')
-        return redirect(url_for('dashboard'))
-    
-    cursor = conn.cursor(dictionary=True)
-    
     try:
-        # Check if current user is admin
-        cursor.execute("SELECT is_admin FROM users WHERE id = %s", (session['user_id'],))
-        user = cursor.fetchone()
-        
-        if not user or not user.get('is_admin', False):
-            flash('Access denied! Admin privileges required.', 'danger')
-            return redirect(url_for('dashboard'))
-        
-        # Get all users
-        cursor.execute("SELECT id, username, email, created_at FROM users ORDER BY created_at DESC")
-        users = cursor.fetchall()
+        with db_cursor() as cursor:
+            # Check if current user is admin
+            cursor.execute("SELECT is_admin FROM users WHERE id = %s", (session['user_id'],))
+            user = cursor.fetchone()
+            
+            if not user or not user.get('is_admin', False):
+                flash('Access denied! Admin privileges required.', 'danger')
+                return redirect(url_for('dashboard'))
+            
+            # Get all users
+            cursor.execute("SELECT id, username, email, created_at FROM users ORDER BY created_at DESC")
+            users = cursor.fetchall()
+            
+            # Get recent predictions
+            cursor.execute("""
+                SELECT p.id, p.stock_symbol, p.prediction_date, u.username, u.email
+                FROM predictions p
+                JOIN users u ON p.user_id = u.id
+                ORDER BY p.prediction_date DESC
+                LIMIT 20
+            """)
+            recent_predictions = cursor.fetchall()
         
         # Get all predictions count
-        cursor.execute("SELECT COUNT(*) as total FROM predictions")
-        total_predictions = cursor.fetchone()['total']
-        
-        # Get recent predictions
-        cursor.execute("""
-            SELECT p.id, p.stock_symbol, p.prediction_date, u.username, u.email
-            FROM predictions p
-            JOIN users u ON p.user_id = u.id
-            ORDER BY p.prediction_date DESC
-            LIMIT 20
-        """)
-        recent_predictions = cursor.fetchall()
+        total_predictions = _count_all_predictions()
         
         return render_template('admin.html', 
                              users=users, 
                              total_predictions=total_predictions,
                              recent_predictions=recent_predictions)
     
-    except Exception as e:
-        print(f"Admin error: {e}")
-        flash('Error loading admin panel!', 'danger')
+    except ConnectionError:
+        flash('Database connection error!', 'danger')
         return redirect(url_for('dashboard'))
     
-    finally:
-        cursor.close()
-        conn.close()
+    except Exception:
+        app.logger.exception("Admin error")
+        flash('Error loading admin panel!', 'danger')
+        return redirect(url_for('dashboard'))
 
 # ============================================================================
 # WATCHLIST ROUTES
@@ -1109,47 +1390,34 @@ def watchlist():
         flash('Please login first!', 'warning')
         return redirect(url_for('login'))
     
-    conn = get_db_connection()
-    if not conn:
-        flash('Database connection error!', 'danger')
-        return render_template('watchlist.html', watchlist_stocks=[])
-    
-    cursor = conn.cursor(dictionary=True)
-    
     try:
         # Get user's watchlist with current prices
-        cursor.execute("""
-            SELECT id, stock_symbol, stock_name, added_date, alert_price
-            FROM watchlist 
-            WHERE user_id = %s 
-            ORDER BY added_date DESC
-        """, (session['user_id'],))
+        with db_cursor() as cursor:
+            # Last prediction per stock comes from the same query (no per-row lookups)
+            cursor.execute("""
+                SELECT w.id, w.stock_symbol, w.stock_name, w.added_date, w.alert_price,
+                       (SELECT MAX(p.prediction_date) FROM predictions p
+                        WHERE p.user_id = w.user_id AND p.stock_symbol = w.stock_symbol) AS last_prediction
+                FROM watchlist w
+                WHERE w.user_id = %s 
+                ORDER BY w.added_date DESC
+            """, (session['user_id'],))
+            
+            watchlist_stocks = cursor.fetchall()
         
-        watchlist_stocks = cursor.fetchall()
+        # Get current prices for all watchlist stocks in one batch (connection already released)
+        symbols = list(dict.fromkeys(stock['stock_symbol'] for stock in watchlist_stocks))
+        prices = get_batch_prices(symbols) if symbols else {}
         
-        # Get current prices for watchlist stocks
-        import yfinance as yf
         for stock in watchlist_stocks:
-            try:
-                ticker = yf.Ticker(stock['stock_symbol'])
-                history = ticker.history(period='1d')
-                
-                if not history.empty:
-                    current_price = history['Close'].iloc[-1]
-                    prev_close = ticker.info.get('previousClose', current_price)
-                    change = current_price - prev_close
-                    change_pct = (change / prev_close * 100) if prev_close else 0
-                    
-                    stock['current_price'] = current_price
-                    stock['change'] = change
-                    stock['change_pct'] = change_pct
-                    stock['is_positive'] = change >= 0
-                else:
-                    stock['current_price'] = None
-                    stock['change'] = 0
-                    stock['change_pct'] = 0
-                    stock['is_positive'] = True
-            except:
+            price = prices.get(stock['stock_symbol'], {})
+            
+            if price.get('success'):
+                stock['current_price'] = price['price']
+                stock['change'] = price['change']
+                stock['change_pct'] = price['changePercent']
+                stock['is_positive'] = price['change'] >= 0
+            else:
                 stock['current_price'] = None
                 stock['change'] = 0
                 stock['change_pct'] = 0
@@ -1157,14 +1425,14 @@ def watchlist():
         
         return render_template('watchlist.html', watchlist_stocks=watchlist_stocks)
     
-    except Exception as e:
-        print(f"Watchlist error: {e}")
-        flash('Error loading watchlist!', 'danger')
+    except ConnectionError:
+        flash('Database connection error!', 'danger')
         return render_template('watchlist.html', watchlist_stocks=[])
     
-    finally:
-        cursor.close()
-        conn.close()
+    except Exception:
+        app.logger.exception("Watchlist error")
+        flash('Error loading watchlist!', 'danger')
+        return render_template('watchlist.html', watchlist_stocks=[])
 
 @app.route('/watchlist/add', methods=['POST'])
 def add_to_watchlist():
@@ -1177,35 +1445,28 @@ def add_to_watchlist():
     if not stock_symbol:
         return jsonify({'success': False, 'message': 'Stock symbol is required'})
     
-    conn = get_db_connection()
-    if not conn:
-        return jsonify({'success': False, 'message': 'Database connection error'})
-    
-    cursor = conn.cursor(dictionary=True)
-    
     try:
         # Get stock name from yfinance
-        import yfinance as yf
-        ticker = yf.Ticker(stock_symbol)
-        info = ticker.info
-        stock_name = info.get('longName', stock_symbol.replace('.NS', '').replace('.BO', ''))
-        
-        # Check if already in watchlist
-        cursor.execute("""
-            SELECT id FROM watchlist 
-            WHERE user_id = %s AND stock_symbol = %s
-        """, (session['user_id'], stock_symbol))
+        stock_name = get_stock_name(stock_symbol)
         
-        if cursor.fetchone():
-            return jsonify({'success': False, 'message': 'Stock already in watchlist'})
-        
-        # Add to watchlist
-        cursor.execute("""
-            INSERT INTO watchlist (user_id, stock_symbol, stock_name)
-            VALUES (%s, %s, %s)
-        """, (session['user_id'], stock_symbol, stock_name))
+        with db_cursor() as cursor:
+            # Check if already in watchlist
+            cursor.execute("""
+                SELECT 1 FROM watchlist 
+                WHERE user_id = %s AND stock_symbol = %s
+                LIMIT 1
+            """, (session['user_id'], stock_symbol))
+            
+            if cursor.fetchone():
+                return jsonify({'success': False, 'message': 'Stock already in watchlist'})
+            
+            # Add to watchlist
+            cursor.execute("""
+                INSERT INTO watchlist (user_id, stock_symbol, stock_name)
+                VALUES (%s, %s, %s)
+            """, (session['user_id'], stock_symbol, stock_name))
         
-        conn.commit()
+        cache.delete_memoized(_get_user_stats, session['user_id'])
         
         return jsonify({
             'success': True, 
@@ -1213,13 +1474,12 @@ def add_to_watchlist():
             'stock_name': stock_name
         })
     
+    except ConnectionError:
+        return jsonify({'success': False, 'message': 'Database connection error'})
+    
     except Exception as e:
-        print(f"Error adding to watchlist: {e}")
+        app.logger.exception("Error adding to watchlist")
         return jsonify({'success': False, 'message': str(e)})
-    
-    finally:
-        cursor.close()
-        conn.close()
 
 @app.route('/watchlist/remove/<int:watchlist_id>', methods=['POST'])
 def remove_from_watchlist(watchlist_id):
@@ -1227,33 +1487,28 @@ def remove_from_watchlist(watchlist_id):
     if 'user_id' not in session:
         return jsonify({'success': False, 'message': 'Please login first'})
     
-    conn = get_db_connection()
-    if not conn:
-        return jsonify({'success': False, 'message': 'Database connection error'})
-    
-    cursor = conn.cursor()
-    
     try:
-        # Delete from watchlist (ensure it belongs to user)
-        cursor.execute("""
-            DELETE FROM watchlist 
-            WHERE id = %s AND user_id = %s
-        """, (watchlist_id, session['user_id']))
+        with db_cursor(dictionary=False) as cursor:
+            # Delete from watchlist (ensure it belongs to user)
+            cursor.execute("""
+                DELETE FROM watchlist 
+                WHERE id = %s AND user_id = %s
+            """, (watchlist_id, session['user_id']))
+            removed = cursor.rowcount > 0
         
-        conn.commit()
+        cache.delete_memoized(_get_user_stats, session['user_id'])
         
-        if cursor.rowcount > 0:
+        if removed:
             return jsonify({'success': True, 'message': 'Removed from watchlist'})
         else:
             return jsonify({'success': False, 'message': 'Stock not found in watchlist'})
     
+    except ConnectionError:
+        return jsonify({'success': False, 'message': 'Database connection error'})
+    
     except Exception as e:
-        print(f"Error removing from watchlist: {e}")
+        app.logger.exception("Error removing from watchlist")
         return jsonify({'success': False, 'message': str(e)})
-    
-    finally:
-        cursor.close()
-        conn.close()
 
 @app.route('/watchlist/set-alert', methods=['POST'])
 def set_price_alert():
@@ -1272,37 +1527,124 @@ def set_price_alert():
     except ValueError:
         return jsonify({'success': False, 'message': 'Invalid price'})
     
-    conn = get_db_connection()
-    if not conn:
-        return jsonify({'success': False, 'message': 'Database connection error'})
-    
-    cursor = conn.cursor()
-    
     try:
-        cursor.execute("""
-            UPDATE watchlist 
-            SET alert_price = %s 
-            WHERE id = %s AND user_id = %s
-        """, (alert_price, watchlist_id, session['user_id']))
-        
-        conn.commit()
+        with db_cursor(dictionary=False) as cursor:
+            cursor.execute("""
+                UPDATE watchlist 
+                SET alert_price = %s 
+                WHERE id = %s AND user_id = %s
+            """, (alert_price, watchlist_id, session['user_id']))
         
         return jsonify({'success': True, 'message': f'Price alert set at ₹{alert_price:.2f}'})
     
+    except ConnectionError:
+        return jsonify({'success': False, 'message': 'Database connection error'})
+    
     except Exception as e:
-        print(f"Error setting alert: {e}")
+        app.logger.exception("Error setting alert")
         return jsonify({'success': False, 'message': str(e)})
-    
-    finally:
-        cursor.close()
-        conn.close()
 
 
 # ============================================================================
 # TECHNICAL INDICATORS ROUTES
 # ============================================================================
 
-@app.route('/technical/<stock_symbol>')
+# History and indicators for a symbol are reused for a couple of minutes
+TECHNICAL_CACHE_SECONDS = 120
+
+@cache.memoize(timeout=TECHNICAL_CACHE_SECONDS)
+def _cached_stock_data(stock_symbol, period):
+    """Cached wrapper around fetch_stock_data()"""
+    return fetch_stock_data(stock_symbol, period=period)
+
+@cache.memoize(timeout=TECHNICAL_CACHE_SECONDS)
+def _cached_technical_analysis(stock_symbol):
+    """Cached wrapper around analyze_stock_technical(), with the time it was computed"""
+    analysis = analyze_stock_technical(stock_symbol)
+    return None if analysis is None else (analysis, time.time())
+
+def get_technical_data(stock_symbol, period):
+    """Fetch price history for technical analysis (cached per symbol and period)"""
+    return _cached_stock_data(stock_symbol.strip().upper(), period)
+
+def get_technical_analysis(stock_symbol):
+    """Run the full technical analysis for a symbol (cached per symbol)"""
+    cached = _cached_technical_analysis(stock_symbol.strip().upper())
+    return None if cached is None else cached[0]
+
+def get_technical_analysis_version(stock_symbol):
+    """
+    Cached technical analysis plus an ETag that only changes when it is recomputed
+    
+    Returns:
+    - tuple: (analysis, computed_at datetime, etag), or (None, None, None) without data
+    """
+    stock_symbol = stock_symbol.strip().upper()
+    cached = _cached_technical_analysis(stock_symbol)
+    if cached is None:
+        return None, None, None
+    
+    analysis, computed_at = cached
+    return analysis, datetime.fromtimestamp(computed_at), f"{stock_symbol}-{computed_at:.6f}"
+
+def _not_modified(etag):
+    """304 response when the client's If-None-Match already holds etag, else None"""
+    if etag in request.if_none_match:
+        response = app.response_class(status=304)
+        response.set_etag(etag)
+        return response
+    return None
+
+@app.after_request
+def add_technical_etag(response):
+    """
+    Let browsers revalidate technical-analysis JSON with If-None-Match
+    
+    Endpoints serving the cached analysis set an ETag from its compute time
+    (and answer 304 before building the body); the others get a body hash.
+    """
+    if (request.method == 'GET' and response.status_code == 200
+            and request.path.startswith('/api/technical/')):
+        response.add_etag()
+        response = response.make_conditional(request)
+    return response
+
+def _records_with_iso_date(df, cols=None, n=90):
+    """
+    Convert the last n rows of an indicator frame to chart records
+    
+    Dates are formatted in one vectorized pass instead of per record.
+    
+    Parameters:
+    - df: DataFrame with a datetime 'Date' column
+    - cols: Columns to include (default: all)
+    - n: Number of trailing rows (default 90)
+    
+    Returns:
+    - list: Row dicts with 'Date' as YYYY-MM-DD strings
+    """
+    tail = (df if cols is None else df[cols]).tail(n).copy()
+    tail['Date'] = tail['Date'].dt.strftime('%Y-%m-%d')
+    return tail.to_dict('records')
+
+def _columns_with_iso_date(df, cols, n=90):
+    """
+    Convert the last n rows of an indicator frame to a columnar payload
+    
+    Parameters:
+    - df: DataFrame with a datetime 'Date' column
+    - cols: Columns to include
+    - n: Number of trailing rows (default 90)
+    
+    Returns:
+    - dict: {column: list of values}, with 'Date' as YYYY-MM-DD strings
+    """
+    tail = df[cols].tail(n)
+    columns = {col: tail[col].tolist() for col in cols}
+    columns['Date'] = tail['Date'].dt.strftime('%Y-%m-%d').tolist()
+    return columns
+
+@app.route('/technical/<symbol:stock_symbol>')
 def technical_analysis(stock_symbol):
     """Technical analysis page for a specific stock"""
     if 'user_id' not in session:
@@ -1311,7 +1653,7 @@ def technical_analysis(stock_symbol):
     
     try:
         # Fetch stock data
-        stock_data = fetch_stock_data(stock_symbol, period='1y')
+        stock_data = get_technical_data(stock_symbol, '1y')
         
         if stock_data is None or stock_data.empty:
             flash(f'No data found for {stock_symbol}', 'danger')
@@ -1325,27 +1667,23 @@ def technical_analysis(stock_symbol):
         data_with_indicators = ti.get_data_with_indicators()
         
         # Prepare chart data (last 90 days)
-        chart_data = data_with_indicators.tail(90).to_dict('records')
-        for record in chart_data:
-            record['Date'] = record['Date'].strftime('%Y-%m-%d')
+        chart_data = _records_with_iso_date(data_with_indicators)
         
         return render_template('technical_analysis.html',
                              stock_symbol=stock_symbol,
                              analysis=analysis,
-                             chart_data=json.dumps(chart_data))
+                             chart_data=chart_data)
     
-    except Exception as e:
-        print(f"Technical analysis error: {e}")
-        import traceback
-        traceback.print_exc()
+    except Exception:
+        app.logger.exception("Technical analysis error")
         flash(f'Error analyzing {stock_symbol}', 'danger')
         return redirect(url_for('dashboard'))
 
-@app.route('/api/technical/<stock_symbol>')
+@app.route('/api/technical/<symbol:stock_symbol>')
 def api_technical_indicators(stock_symbol):
     """API endpoint for technical indicators"""
     try:
-        analysis = analyze_stock_technical(stock_symbol)
+        analysis, computed_at, etag = get_technical_analysis_version(stock_symbol)
         
         if analysis is None:
             return jsonify({
@@ -1353,11 +1691,19 @@ def api_technical_indicators(stock_symbol):
                 'message': f'No data available for {stock_symbol}'
             })
         
-        return jsonify({
+        not_modified = _not_modified(etag)
+        if not_modified is not None:
+            return not_modified
+        
+        # The timestamp is when the analysis was computed, so the body (and
+        # its ETag) stays the same for as long as the cached analysis does
+        response = jsonify({
             'success': True,
             'data': analysis,
-            'timestamp': datetime.now().isoformat()
+            'timestamp': computed_at
         })
+        response.set_etag(etag)
+        return response
     
     except Exception as e:
         return jsonify({
@@ -1365,7 +1711,14 @@ def api_technical_indicators(stock_symbol):
             'message': str(e)
         })
 
-@app.route('/api/technical/<stock_symbol>/indicators')
+# Query name -> (response key, TechnicalIndicators method, chart columns)
+CHART_INDICATORS = {
+    'rsi': ('rsi', 'calculate_rsi', ['Date', 'Close', 'RSI', 'RSI_Signal']),
+    'macd': ('macd', 'calculate_macd', ['Date', 'Close', 'MACD', 'MACD_Signal', 'MACD_Histogram']),
+    'bb': ('bollinger_bands', 'calculate_bollinger_bands', ['Date', 'Close', 'BB_Upper', 'BB_Middle', 'BB_Lower'])
+}
+
+@app.route('/api/technical/<symbol:stock_symbol>/indicators')
 def api_specific_indicators(stock_symbol):
     """Get specific indicators with historical data"""
     try:
@@ -1373,8 +1726,12 @@ def api_specific_indicators(stock_symbol):
         indicators = request.args.get('indicators', 'rsi,macd,bb').split(',')
         period = request.args.get('period', '3mo')
         
+        # ?format=columns returns {column: [values]} instead of one object per bar
+        to_payload = (_columns_with_iso_date if request.args.get('format') == 'columns'
+                      else _records_with_iso_date)
+        
         # Fetch data
-        stock_data = fetch_stock_data(stock_symbol, period=period)
+        stock_data = get_technical_data(stock_symbol, period)
         
         if stock_data is None or stock_data.empty:
             return jsonify({
@@ -1391,30 +1748,21 @@ def api_specific_indicators(stock_symbol):
             'data': {}
         }
         
-        # Calculate requested indicators
-        if 'rsi' in indicators:
-            ti.calculate_rsi()
-            result['data']['rsi'] = ti.data[['Date', 'Close', 'RSI', 'RSI_Signal']].tail(90).to_dict('records')
-        
-        if 'macd' in indicators:
-            ti.calculate_macd()
-            result['data']['macd'] = ti.data[['Date', 'Close', 'MACD', 'MACD_Signal', 'MACD_Histogram']].tail(90).to_dict('records')
-        
-        if 'bb' in indicators:
-            ti.calculate_bollinger_bands()
-            result['data']['bollinger_bands'] = ti.data[['Date', 'Close', 'BB_Upper', 'BB_Middle', 'BB_Lower']].tail(90).to_dict('records')
+        # Calculate requested indicators, then slice the 90-day window once
+        requested = [name for name in CHART_INDICATORS if name in indicators]
+        if requested:
+            for name in requested:
+                getattr(ti, CHART_INDICATORS[name][1])()
+            
+            tail90 = ti.data.tail(90)
+            for name in requested:
+                key, _, columns = CHART_INDICATORS[name]
+                result['data'][key] = to_payload(tail90, columns)
         
         if 'volume' in indicators:
             volume_analysis = ti.analyze_volume()
             result['data']['volume'] = volume_analysis
         
-        # Format dates
-        for indicator in result['data']:
-            if isinstance(result['data'][indicator], list):
-                for record in result['data'][indicator]:
-                    if 'Date' in record:
-                        record['Date'] = record['Date'].strftime('%Y-%m-%d')
-        
         return jsonify(result)
     
     except Exception as e:
@@ -1423,11 +1771,11 @@ def api_specific_indicators(stock_symbol):
             'message': str(e)
         })
 
-@app.route('/api/technical/<stock_symbol>/patterns')
+@app.route('/api/technical/<symbol:stock_symbol>/patterns')
 def api_candlestick_patterns(stock_symbol):
     """Get candlestick patterns"""
     try:
-        stock_data = fetch_stock_data(stock_symbol, period='3mo')
+        stock_data = get_technical_data(stock_symbol, '3mo')
         
         if stock_data is None or stock_data.empty:
             return jsonify({
@@ -1453,11 +1801,11 @@ def api_candlestick_patterns(stock_symbol):
             'message': str(e)
         })
 
-@app.route('/api/technical/<stock_symbol>/support-resistance')
+@app.route('/api/technical/<symbol:stock_symbol>/support-resistance')
 def api_support_resistance(stock_symbol):
     """Get support and resistance levels"""
     try:
-        stock_data = fetch_stock_data(stock_symbol, period='6mo')
+        stock_data = get_technical_data(stock_symbol, '6mo')
         
         if stock_data is None or stock_data.empty:
             return jsonify({
@@ -1479,11 +1827,11 @@ def api_support_resistance(stock_symbol):
             'message': str(e)
         })
 
-@app.route('/api/technical/<stock_symbol>/recommendation')
+@app.route('/api/technical/<symbol:stock_symbol>/recommendation')
 def api_trading_recommendation(stock_symbol):
     """Get trading recommendation based on technical analysis"""
     try:
-        analysis = analyze_stock_technical(stock_symbol)
+        analysis, _, etag = get_technical_analysis_version(stock_symbol)
         
         if analysis is None:
             return jsonify({
@@ -1491,7 +1839,11 @@ def api_trading_recommendation(stock_symbol):
                 'message': 'No data available'
             })
         
-        return jsonify({
+        not_modified = _not_modified(etag)
+        if not_modified is not None:
+            return not_modified
+        
+        response = jsonify({
             'success': True,
             'stock_symbol': stock_symbol,
             'recommendation': analysis['recommendation'],
@@ -1502,6 +1854,8 @@ def api_trading_recommendation(stock_symbol):
                 'bb_signal': analysis['bollinger_bands']['signal']
             }
         })
+        response.set_etag(etag)
+        return response
     
     except Exception as e:
         return jsonify({
@@ -1509,6 +1863,51 @@ def api_trading_recommendation(stock_symbol):
             'message': str(e)
         })
 
+# Background workers for the scanner's per-symbol analysis
+scanner_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='scanner')
+SCANNER_TIMEOUT_SECONDS = 10
+
+@cache.memoize(timeout=TECHNICAL_CACHE_SECONDS)
+def _cached_scanner_data(symbols):
+    """Cached one-request download of a year of history for the scanner symbols"""
+    return fetch_many_stock_data(list(symbols), period='1y')
+
+def scan_stock(symbol, stock_data=None):
+    """
+    Summarize one symbol for the technical scanner
+    
+    Parameters:
+    - symbol: Stock ticker symbol
+    - stock_data: Pre-fetched history from the batch download; when missing,
+      the symbol is analyzed with its own (cached) fetch
+    
+    Returns:
+    - dict: Scanner row, or None if analysis fails
+    """
+    try:
+        if stock_data is not None:
+            # The scanner row has no levels or patterns, so skip computing them
+            analysis = TechnicalIndicators(stock_data).calculate_all_indicators(include_details=False)
+        else:
+            analysis = get_technical_analysis(symbol)
+        
+        if not analysis:
+            return None
+        
+        return {
+            'symbol': symbol,
+            'price': analysis['current_price'],
+            'trend': analysis['trend'],
+            'rsi': analysis['rsi']['value'],
+            'rsi_signal': analysis['rsi']['signal'],
+            'macd_signal': analysis['macd']['signal'],
+            'recommendation': analysis['recommendation']
+        }
+    
+    except Exception:
+        app.logger.exception("Scanner error for %s", symbol)
+        return None
+
 @app.route('/technical-scanner')
 def technical_scanner():
     """Technical scanner page for multiple stocks"""
@@ -1520,23 +1919,15 @@ def technical_scanner():
     default_stocks = ['RELIANCE.NS', 'TCS.NS', 'INFY.NS', 'HDFCBANK.NS', 
                      'ICICIBANK.NS', 'HINDUNILVR.NS', 'SBIN.NS', 'BHARTIARTL.NS']
     
-    scanner_results = []
+    # One batched download for every symbol, then analyze them concurrently;
+    # anything slower than the timeout is skipped
+    history = _cached_scanner_data(tuple(default_stocks))
+    futures = [scanner_executor.submit(scan_stock, symbol, history.get(symbol))
+               for symbol in default_stocks]
+    done, _ = wait(futures, timeout=SCANNER_TIMEOUT_SECONDS)
     
-    for symbol in default_stocks:
-        try:
-            analysis = analyze_stock_technical(symbol)
-            if analysis:
-                scanner_results.append({
-                    'symbol': symbol,
-                    'price': analysis['current_price'],
-                    'trend': analysis['trend'],
-                    'rsi': analysis['rsi']['value'],
-                    'rsi_signal': analysis['rsi']['signal'],
-                    'macd_signal': analysis['macd']['signal'],
-                    'recommendation': analysis['recommendation']
-                })
-        except:
-            continue
+    scanner_results = [future.result() for future in futures
+                       if future in done and future.result()]
     
     return render_template('technical_scanner.html', results=scanner_results)
 
@@ -3,8 +3,9 @@ Create Admin User Script
 Run this to create an admin user or make existing user admin
 """
 
-from werkzeug.security import generate_password_hash
+from mysql.connector import errors, errorcode
 from database.db_connection import get_db_connection
+from utils.passwords import hash_password
 import sys
 
 def create_admin_user(username, email, password):
@@ -14,14 +15,22 @@ def create_admin_user(username, email, password):
         print("❌ Database connection failed!")
         return False
     
-    cursor = conn.cursor(dictionary=True)
+    cursor = conn.cursor()
     
     try:
-        # Check if user already exists
-        cursor.execute("SELECT * FROM users WHERE email = %s", (email,))
-        existing_user = cursor.fetchone()
+        # Hash password
+        hashed_password = hash_password(password)
         
-        if existing_user:
+        # Create admin user; the unique email index reports an existing user
+        try:
+            cursor.execute(
+                "INSERT INTO users (username, email, password, is_admin) VALUES (%s, %s, %s, TRUE)",
+                (username, email, hashed_password)
+            )
+        except errors.IntegrityError as e:
+            if e.errno != errorcode.ER_DUP_ENTRY:
+                raise
+            
             print(f"⚠️  User with email {email} already exists!")
             response = input("Make this user admin? (yes/no): ")
             if response.lower() == 'yes':
@@ -33,14 +42,6 @@ def create_admin_user(username, email, password):
                 print("❌ Operation cancelled.")
                 return False
         
-        # Hash password
-        hashed_password = generate_password_hash(password, method='pbkdf2:sha256')
-        
-        # Create admin user
-        cursor.execute(
-            "INSERT INTO users (username, email, password, is_admin) VALUES (%s, %s, %s, TRUE)",
-            (username, email, hashed_password)
-        )
         conn.commit()
         
         print("\n" + "="*60)
@@ -71,26 +72,25 @@ def make_user_admin(email):
         print("❌ Database connection failed!")
         return False
     
-    cursor = conn.cursor(dictionary=True)
+    cursor = conn.cursor()
     
     try:
-        # Check if user exists
-        cursor.execute("SELECT * FROM users WHERE email = %s", (email,))
-        user = cursor.fetchone()
-        
-        if not user:
-            print(f"❌ No user found with email: {email}")
-            return False
+        # Make admin in one statement; only look the user up if nothing changed
+        cursor.execute("UPDATE users SET is_admin = TRUE WHERE email = %s AND is_admin = FALSE", (email,))
+        conn.commit()
         
-        if user.get('is_admin'):
+        if cursor.rowcount == 0:
+            cursor.execute("SELECT is_admin FROM users WHERE email = %s", (email,))
+            user = cursor.fetchone()
+            
+            if not user:
+                print(f"❌ No user found with email: {email}")
+                return False
+            
             print(f"ℹ️  User {email} is already an admin!")
             return True
         
-        # Make admin
-        cursor.execute("UPDATE users SET is_admin = TRUE WHERE email = %s", (email,))
-        conn.commit()
-        
-        print(f"✅ User {email} ({user['username']}) is now an admin!")
+        print(f"✅ User {email} is now an admin!")
         return True
     
     except Exception as e:
@@ -108,7 +108,7 @@ def list_admins():
         print("❌ Database connection failed!")
         return
     
-    cursor = conn.cursor(dictionary=True)
+    cursor = conn.cursor()
     
     try:
         cursor.execute("SELECT username, email, created_at FROM users WHERE is_admin = TRUE")
@@ -121,10 +121,10 @@ def list_admins():
         print("\n" + "="*60)
         print("Admin Users:")
         print("="*60)
-        for admin in admins:
-            print(f"Username: {admin['username']}")
-            print(f"Email: {admin['email']}")
-            print(f"Created: {admin['created_at']}")
+        for username, email, created_at in admins:
+            print(f"Username: {username}")
+            print(f"Email: {email}")
+            print(f"Created: {created_at}")
             print("-"*60)
     
     except Exception as e:
@@ -141,23 +141,24 @@ def remove_admin(email):
         print("❌ Database connection failed!")
         return False
     
-    cursor = conn.cursor(dictionary=True)
+    cursor = conn.cursor()
     
     try:
-        cursor.execute("SELECT * FROM users WHERE email = %s", (email,))
-        user = cursor.fetchone()
-        
-        if not user:
-            print(f"❌ No user found with email: {email}")
-            return False
+        # Demote in one statement; only look the user up if nothing changed
+        cursor.execute("UPDATE users SET is_admin = FALSE WHERE email = %s AND is_admin = TRUE", (email,))
+        conn.commit()
         
-        if not user.get('is_admin'):
+        if cursor.rowcount == 0:
+            cursor.execute("SELECT is_admin FROM users WHERE email = %s", (email,))
+            user = cursor.fetchone()
+            
+            if not user:
+                print(f"❌ No user found with email: {email}")
+                return False
+            
             print(f"ℹ️  User {email} is not an admin!")
             return True
         
-        cursor.execute("UPDATE users SET is_admin = FALSE WHERE email = %s", (email,))
-        conn.commit()
-        
         print(f"✅ Admin privileges removed from {email}")
         return True
     
@@ -0,0 +1,84 @@
+-- Index migration for lookups by email and user_id
+-- Run this if your database was created from an older or hand-made schema
+-- (schema.sql / complet_schema.sql already define these indexes, and the
+-- names here match theirs rather than new idx_users_email-style names so
+-- the two never end up with duplicate indexes)
+
+USE stock_prediction_db;
+
+-- MySQL has no ADD/DROP INDEX IF EXISTS (that is MariaDB syntax), so each
+-- change checks information_schema first and the script is safe to re-run.
+
+-- Login, registration and profile updates look users up by email.
+-- The UNIQUE key already gives an index, so the plain duplicate is dropped.
+SET @sql = IF(
+    (SELECT COUNT(*) FROM information_schema.statistics
+     WHERE table_schema = DATABASE() AND table_name = 'users' AND index_name = 'email') = 0,
+    'ALTER TABLE users ADD UNIQUE INDEX email (email)',
+    'SELECT 1');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SET @sql = IF(
+    (SELECT COUNT(*) FROM information_schema.statistics
+     WHERE table_schema = DATABASE() AND table_name = 'users' AND index_name = 'idx_email') > 0,
+    'ALTER TABLE users DROP INDEX idx_email',
+    'SELECT 1');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+-- Profile counts filter predictions by user; the dashboard also orders by date.
+-- The composite index serves both (and the user_id foreign key), so the
+-- single-column index is dropped once it exists.
+SET @sql = IF(
+    (SELECT COUNT(*) FROM information_schema.statistics
+     WHERE table_schema = DATABASE() AND table_name = 'predictions' AND index_name = 'idx_user_date') = 0,
+    'ALTER TABLE predictions ADD INDEX idx_user_date (user_id, prediction_date)',
+    'SELECT 1');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SET @sql = IF(
+    (SELECT COUNT(*) FROM information_schema.statistics
+     WHERE table_schema = DATABASE() AND table_name = 'predictions' AND index_name = 'idx_user_id') > 0,
+    'ALTER TABLE predictions DROP INDEX idx_user_id',
+    'SELECT 1');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+-- Watchlist page looks up each stock's latest prediction for the user
+SET @sql = IF(
+    (SELECT COUNT(*) FROM information_schema.statistics
+     WHERE table_schema = DATABASE() AND table_name = 'predictions' AND index_name = 'idx_user_symbol_date') = 0,
+    'ALTER TABLE predictions ADD INDEX idx_user_symbol_date (user_id, stock_symbol, prediction_date)',
+    'SELECT 1');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+-- Profile counts and the watchlist page filter watchlist rows by user
+SET @sql = IF(
+    (SELECT COUNT(*) FROM information_schema.statistics
+     WHERE table_schema = DATABASE() AND table_name = 'watchlist' AND index_name = 'idx_user_id') = 0,
+    'ALTER TABLE watchlist ADD INDEX idx_user_id (user_id)',
+    'SELECT 1');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+-- Verify the indexes are used (type should be "ref"/"const", not "ALL")
+EXPLAIN SELECT id FROM users WHERE email = 'admin@stockpredictor.com';
+EXPLAIN SELECT COUNT(*) FROM predictions WHERE user_id = 1;
+EXPLAIN SELECT id, stock_symbol, prediction_date, predicted_values
+FROM predictions WHERE user_id = 1 ORDER BY prediction_date DESC LIMIT 10;
+EXPLAIN SELECT COUNT(*) FROM watchlist WHERE user_id = 1;
+
+SHOW INDEX FROM users;
+SHOW INDEX FROM predictions;
+SHOW INDEX FROM watchlist;
+
+SELECT 'Indexes updated successfully!' as message;
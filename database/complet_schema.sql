@@ -58,7 +58,6 @@ CREATE TABLE IF NOT EXISTS users (
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     
     -- Indexes for performance
-    INDEX idx_email (email),
     INDEX idx_is_admin (is_admin),
     INDEX idx_profile_picture (profile_picture),
     INDEX idx_theme (theme),
@@ -79,7 +78,8 @@ CREATE TABLE IF NOT EXISTS predictions (
     verification_date TIMESTAMP NULL DEFAULT NULL,
     
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
-    INDEX idx_user_id (user_id),
+    INDEX idx_user_date (user_id, prediction_date),
+    INDEX idx_user_symbol_date (user_id, stock_symbol, prediction_date),
     INDEX idx_stock_symbol (stock_symbol),
     INDEX idx_prediction_date (prediction_date),
     INDEX idx_prediction_status (prediction_status)
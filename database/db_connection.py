@@ -1,33 +1,107 @@
+import logging
 import mysql.connector
-from mysql.connector import Error
+from mysql.connector import Error, pooling
 import os
+import threading
+import time
+from contextlib import contextmanager
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+# Read .env once at import; the settings below are fixed for the process
+load_dotenv()
+
+DB_HOST = os.getenv('DB_HOST', 'localhost')
+DB_NAME = os.getenv('DB_NAME', 'stock_prediction_db')
+DB_USER = os.getenv('DB_USER', 'root')
+DB_PASSWORD = os.getenv('DB_PASSWORD', '')
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 10))
+
+# Shared connection pool, created on first use
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_connection_pool():
+    """
+    Create (once) and return the MySQL connection pool
+    Pool size can be tuned with the DB_POOL_SIZE environment variable (max 32)
+    """
+    global _pool
+    
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = pooling.MySQLConnectionPool(
+                    pool_name='stock_prediction_pool',
+                    pool_size=DB_POOL_SIZE,
+                    pool_reset_session=True,
+                    host=DB_HOST,
+                    database=DB_NAME,
+                    user=DB_USER,
+                    password=DB_PASSWORD,
+                    charset='utf8mb4',
+                    use_unicode=True,
+                    # C extension (libmysqlclient) parses result sets much faster
+                    use_pure=False
+                )
+    
+    return _pool
 
 def get_db_connection():
     """
-    Create and return a MySQL database connection
+    Return a MySQL database connection from the shared pool
     Configure these values in environment variables for production
+    
+    Calling close() on the returned connection hands it back to the pool.
+    The pool already pings (and reconnects) connections on checkout, so no
+    extra is_connected() round trip is made here.
     """
     try:
-        # Try to load from environment variables
-        from dotenv import load_dotenv
-        load_dotenv()
-        
-        connection = mysql.connector.connect(
-            host=os.getenv('DB_HOST', 'localhost'),
-            database=os.getenv('DB_NAME', 'stock_prediction_db'),
-            user=os.getenv('DB_USER', 'root'),
-            password=os.getenv('DB_PASSWORD', ''),
-            charset='utf8mb4',
-            use_unicode=True
-        )
-        
-        if connection.is_connected():
-            return connection
+        return get_connection_pool().get_connection()
     
     except Error as e:
         print(f"Error connecting to MySQL: {e}")
         return None
 
+# Cursor sessions slower than this are logged (milliseconds)
+SLOW_QUERY_MS = 100
+
+@contextmanager
+def db_cursor(dictionary=True):
+    """
+    Yield a cursor on a pooled connection
+    
+    Commits when the block completes, rolls back if it raises, and always
+    returns the connection to the pool. Blocks slower than SLOW_QUERY_MS
+    are logged with the last statement executed.
+    
+    Parameters:
+    - dictionary: Return rows as dicts (default True)
+    
+    Raises:
+    - ConnectionError: If no database connection is available
+    """
+    conn = get_db_connection()
+    if not conn:
+        raise ConnectionError('Database connection error')
+    
+    cursor = conn.cursor(dictionary=dictionary)
+    start = time.perf_counter()
+    
+    try:
+        yield cursor
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if elapsed_ms > SLOW_QUERY_MS:
+            logger.warning("Slow query (%.0f ms): %s", elapsed_ms, cursor.statement)
+        cursor.close()
+        conn.close()
+
 def initialize_database():
     """
     Initialize database and create tables if they don't exist
@@ -37,7 +111,8 @@ def initialize_database():
         connection = mysql.connector.connect(
             host=os.getenv('DB_HOST', 'localhost'),
             user=os.getenv('DB_USER', 'root'),
-            password=os.getenv('DB_PASSWORD', 'your_password_here')
+            password=os.getenv('DB_PASSWORD', 'your_password_here'),
+            use_pure=False
         )
         
         cursor = connection.cursor()
@@ -55,7 +130,6 @@ def initialize_database():
                 password VARCHAR(255) NOT NULL,
                 is_admin BOOLEAN DEFAULT FALSE,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                INDEX idx_email (email),
                 INDEX idx_is_admin (is_admin)
             )
         """)
@@ -69,7 +143,8 @@ def initialize_database():
                 prediction_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 predicted_values JSON,
                 FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
-                INDEX idx_user_id (user_id),
+                INDEX idx_user_date (user_id, prediction_date),
+                INDEX idx_user_symbol_date (user_id, stock_symbol, prediction_date),
                 INDEX idx_stock_symbol (stock_symbol),
                 INDEX idx_prediction_date (prediction_date)
             )
@@ -13,7 +13,6 @@ CREATE TABLE IF NOT EXISTS users (
     password VARCHAR(255) NOT NULL,
     is_admin BOOLEAN DEFAULT FALSE,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    INDEX idx_email (email),
     INDEX idx_is_admin (is_admin)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
@@ -25,7 +24,8 @@ CREATE TABLE IF NOT EXISTS predictions (
     prediction_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     predicted_values JSON,
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
-    INDEX idx_user_id (user_id),
+    INDEX idx_user_date (user_id, prediction_date),
+    INDEX idx_user_symbol_date (user_id, stock_symbol, prediction_date),
     INDEX idx_stock_symbol (stock_symbol),
     INDEX idx_prediction_date (prediction_date)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
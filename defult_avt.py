@@ -4,23 +4,20 @@ Run this script once to generate a default avatar image for users
 """
 
 from PIL import Image, ImageDraw, ImageFont
+import functools
 import os
 
-def create_default_avatar():
-    """Create a default avatar image with user icon"""
-    
-    # Create directory if it doesn't exist
-    os.makedirs('static/images', exist_ok=True)
-    
-    # Image settings
-    size = 400
-    background_color = (102, 126, 234)  # #667eea
+@functools.lru_cache(maxsize=None)
+def user_icon_mask(size=400):
+    """
+    Draw the user icon (head + body) once as a grayscale mask
     
-    # Create image
-    img = Image.new('RGB', (size, size), background_color)
-    draw = ImageDraw.Draw(img)
+    Every colored avatar pastes white through this mask, so the ellipses
+    are rasterized once instead of once per color.
+    """
+    mask = Image.new('L', (size, size), 0)
+    draw = ImageDraw.Draw(mask)
     
-    # Draw user icon (simplified)
     center_x, center_y = size // 2, size // 2
     
     # Head circle
@@ -28,7 +25,7 @@ def create_default_avatar():
     draw.ellipse(
         [center_x - head_radius, center_y - 120 - head_radius,
          center_x + head_radius, center_y - 120 + head_radius],
-        fill='white'
+        fill=255
     )
     
     # Body (semicircle)
@@ -37,17 +34,48 @@ def create_default_avatar():
     draw.ellipse(
         [center_x - body_width, center_y + 20,
          center_x + body_width, center_y + 20 + body_height * 2],
-        fill='white'
+        fill=255
     )
     
-    # Save image
-    img.save('static/images/default-avatar.png', 'PNG', quality=95)
-    print("✅ Default avatar created: static/images/default-avatar.png")
+    return mask
+
+def create_icon_avatar(background_color, size=400):
+    """Create a user-icon avatar on a solid background (RGB tuple)"""
+    img = Image.new('RGB', (size, size), background_color)
+    img.paste('white', mask=user_icon_mask(size))
+    return img
+
+def save_avatar(img, path):
+    """Save an avatar PNG unless it was already generated by an earlier run"""
+    if os.path.exists(path):
+        print(f"ℹ️  Avatar already exists, skipping: {path}")
+        return False
+    
+    img.save(path, 'PNG', quality=95)
+    return True
+
+def create_default_avatar():
+    """Create a default avatar image with user icon"""
+    
+    # Create directory if it doesn't exist
+    os.makedirs('static/images', exist_ok=True)
     
-    # Also create a smaller version for navbar
-    img_small = img.resize((200, 200), Image.Resampling.LANCZOS)
-    img_small.save('static/images/default-avatar-small.png', 'PNG', quality=95)
-    print("✅ Small avatar created: static/images/default-avatar-small.png")
+    # Image settings
+    size = 400
+    background_color = (102, 126, 234)  # #667eea
+    
+    # Create image with user icon (simplified)
+    img = create_icon_avatar(background_color, size)
+    
+    # Save image
+    if save_avatar(img, 'static/images/default-avatar.png'):
+        print("✅ Default avatar created: static/images/default-avatar.png")
+    
+    # Also create a smaller version for navbar; a 2x2 box average is exact
+    # for this flat-color image and much cheaper than LANCZOS
+    img_small = img.reduce(2)
+    if save_avatar(img_small, 'static/images/default-avatar-small.png'):
+        print("✅ Small avatar created: static/images/default-avatar-small.png")
 
 def create_placeholder_avatars():
     """Create multiple colored placeholder avatars"""
@@ -69,31 +97,12 @@ def create_placeholder_avatars():
         g = int(color_hex[3:5], 16)
         b = int(color_hex[5:7], 16)
         
-        # Create image
-        img = Image.new('RGB', (size, size), (r, g, b))
-        draw = ImageDraw.Draw(img)
-        
-        center_x, center_y = size // 2, size // 2
-        
-        # Draw user icon
-        head_radius = 80
-        draw.ellipse(
-            [center_x - head_radius, center_y - 120 - head_radius,
-             center_x + head_radius, center_y - 120 + head_radius],
-            fill='white'
-        )
-        
-        body_width = 180
-        body_height = 120
-        draw.ellipse(
-            [center_x - body_width, center_y + 20,
-             center_x + body_width, center_y + 20 + body_height * 2],
-            fill='white'
-        )
+        # Create image with user icon
+        img = create_icon_avatar((r, g, b), size)
         
         # Save
-        img.save(f'static/images/avatar-{color_name}.png', 'PNG', quality=95)
-        print(f"✅ Created avatar: static/images/avatar-{color_name}.png")
+        if save_avatar(img, f'static/images/avatar-{color_name}.png'):
+            print(f"✅ Created avatar: static/images/avatar-{color_name}.png")
 
 def create_avatar_with_initial(initial='U', background_color='#667eea'):
     """Create avatar with user initial"""
@@ -133,8 +142,8 @@ def create_avatar_with_initial(initial='U', background_color='#667eea'):
     draw.text((x, y), text, fill='white', font=font)
     
     # Save
-    img.save('static/images/avatar-initial.png', 'PNG', quality=95)
-    print("✅ Created avatar with initial: static/images/avatar-initial.png")
+    if save_avatar(img, 'static/images/avatar-initial.png'):
+        print("✅ Created avatar with initial: static/images/avatar-initial.png")
 
 if __name__ == '__main__':
     print("Creating default avatar images...")
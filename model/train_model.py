@@ -2,15 +2,83 @@ import numpy as np
 import pandas as pd
 import matplotlib
 matplotlib.use('Agg')  # Use non-interactive backend
-import matplotlib.pyplot as plt
+from matplotlib.artist import setp
+from matplotlib.figure import Figure
 from sklearn.linear_model import LinearRegression
 from sklearn.ensemble import RandomForestRegressor
-from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
+import tensorflow as tf
+from tensorflow.keras import mixed_precision
 from tensorflow.keras.models import Sequential
 from tensorflow.keras.layers import LSTM, Dense, Dropout
 from tensorflow.keras.optimizers import Adam
-import pickle
+from tensorflow.keras.callbacks import EarlyStopping, ReduceLROnPlateau
+import joblib
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from utils._njit import njit
+from utils.indian_stocks import next_trading_days
+from utils.preprocess import inverse_transform_predictions
+
+# Optional RAPIDS cuML: GPU random forest when installed
+try:
+    from cuml.ensemble import RandomForestRegressor as CumlRandomForestRegressor
+    CUML_AVAILABLE = True
+except ImportError:
+    CUML_AVAILABLE = False
+
+GPUS = tf.config.list_physical_devices('GPU')
+GPU_AVAILABLE = bool(GPUS)
+
+# Allocate GPU memory as needed instead of reserving it all up front, so the
+# LSTM can train alongside the other models (see train_and_predict)
+for gpu in GPUS:
+    tf.config.experimental.set_memory_growth(gpu, True)
+
+# On GPUs, run LSTM/Dense matmuls in float16 on Tensor Cores (weights stay float32).
+# CPUs have no fast float16 path, so the default float32 policy is kept there.
+if GPU_AVAILABLE:
+    mixed_precision.set_global_policy('mixed_float16')
+
+def regression_metrics(y_true, y_pred):
+    """
+    Compute RMSE, MAE and R² from a single residual array
+    
+    Returns:
+    - tuple: (rmse, mae, r2), matching sklearn's mean_squared_error,
+      mean_absolute_error and r2_score
+    """
+    y_true = np.asarray(y_true, dtype=np.float64).ravel()
+    residuals = y_true - np.asarray(y_pred, dtype=np.float64).ravel()
+    
+    ss_res = np.dot(residuals, residuals)
+    centered = y_true - y_true.mean()
+    ss_tot = np.dot(centered, centered)
+    
+    rmse = np.sqrt(ss_res / len(y_true))
+    mae = np.abs(residuals).mean()
+    # Same convention as sklearn for a constant target
+    if ss_tot == 0:
+        r2 = 1.0 if ss_res == 0 else 0.0
+    else:
+        r2 = 1 - ss_res / ss_tot
+    
+    return float(rmse), float(mae), float(r2)
+
+def evaluate_model(y_train, train_pred, y_test, test_pred):
+    """Train/test RMSE, MAE and R² for one model"""
+    train_rmse, train_mae, train_r2 = regression_metrics(y_train, train_pred)
+    test_rmse, test_mae, test_r2 = regression_metrics(y_test, test_pred)
+    
+    return {
+        'train_rmse': train_rmse,
+        'test_rmse': test_rmse,
+        'train_mae': train_mae,
+        'test_mae': test_mae,
+        'train_r2': train_r2,
+        'test_r2': test_r2
+    }
 
 def train_linear_regression(X_train, y_train, X_test, y_test):
     """Train and evaluate Linear Regression model"""
@@ -29,14 +97,7 @@ def train_linear_regression(X_train, y_train, X_test, y_test):
     test_pred = model.predict(X_test_lr)
     
     # Metrics
-    metrics = {
-        'train_rmse': np.sqrt(mean_squared_error(y_train, train_pred)),
-        'test_rmse': np.sqrt(mean_squared_error(y_test, test_pred)),
-        'train_mae': mean_absolute_error(y_train, train_pred),
-        'test_mae': mean_absolute_error(y_test, test_pred),
-        'train_r2': r2_score(y_train, train_pred),
-        'test_r2': r2_score(y_test, test_pred)
-    }
+    metrics = evaluate_model(y_train, train_pred, y_test, test_pred)
     
     return model, test_pred, metrics
 
@@ -44,27 +105,25 @@ def train_random_forest(X_train, y_train, X_test, y_test):
     """Train and evaluate Random Forest model"""
     print("Training Random Forest...")
     
-    # Reshape data for Random Forest
-    X_train_rf = X_train.reshape(X_train.shape[0], -1)
-    X_test_rf = X_test.reshape(X_test.shape[0], -1)
+    # Reshape data for Random Forest. Tree ensembles (sklearn and cuML) split on
+    # float32 features, so convert once here instead of inside every fit/predict
+    X_train_rf = np.ascontiguousarray(X_train.reshape(X_train.shape[0], -1), dtype=np.float32)
+    X_test_rf = np.ascontiguousarray(X_test.reshape(X_test.shape[0], -1), dtype=np.float32)
     
-    # Train model
-    model = RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=-1)
-    model.fit(X_train_rf, y_train)
+    # Train model (on the GPU with cuML when available)
+    if CUML_AVAILABLE:
+        model = CumlRandomForestRegressor(n_estimators=100, random_state=42)
+        model.fit(X_train_rf, y_train.astype(np.float32))
+    else:
+        model = RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=-1)
+        model.fit(X_train_rf, y_train)
     
     # Predictions
     train_pred = model.predict(X_train_rf)
     test_pred = model.predict(X_test_rf)
     
     # Metrics
-    metrics = {
-        'train_rmse': np.sqrt(mean_squared_error(y_train, train_pred)),
-        'test_rmse': np.sqrt(mean_squared_error(y_test, test_pred)),
-        'train_mae': mean_absolute_error(y_train, train_pred),
-        'test_mae': mean_absolute_error(y_test, test_pred),
-        'train_r2': r2_score(y_train, train_pred),
-        'test_r2': r2_score(y_test, test_pred)
-    }
+    metrics = evaluate_model(y_train, train_pred, y_test, test_pred)
     
     return model, test_pred, metrics
 
@@ -72,9 +131,11 @@ def train_lstm(X_train, y_train, X_test, y_test):
     """Train and evaluate LSTM model"""
     print("Training LSTM...")
     
-    # Reshape data for LSTM (samples, timesteps, features)
-    X_train_lstm = X_train.reshape((X_train.shape[0], X_train.shape[1], 1))
-    X_test_lstm = X_test.reshape((X_test.shape[0], X_test.shape[1], 1))
+    # Reshape data for LSTM (samples, timesteps, features), converting once to
+    # the float32 layout TensorFlow trains on rather than casting every batch
+    X_train_lstm = np.ascontiguousarray(X_train, dtype=np.float32)[..., np.newaxis]
+    X_test_lstm = np.ascontiguousarray(X_test, dtype=np.float32)[..., np.newaxis]
+    y_train_lstm = np.asarray(y_train, dtype=np.float32)
     
     # Build LSTM model
     model = Sequential([
@@ -83,18 +144,39 @@ def train_lstm(X_train, y_train, X_test, y_test):
         LSTM(50, return_sequences=False),
         Dropout(0.2),
         Dense(25),
-        Dense(1)
+        # Output layer stays float32 so the loss is computed at full precision
+        Dense(1, dtype='float32')
     ])
     
-    # Compile model
-    model.compile(optimizer=Adam(learning_rate=0.001), loss='mean_squared_error')
-    
-    # Train model
+    # Compile model (under mixed_float16, Keras wraps Adam in a LossScaleOptimizer).
+    # XLA fuses the per-timestep LSTM ops on CPU; on GPU it would keep Keras
+    # from dispatching the LSTM layers to the fused cuDNN kernel, so it stays off.
+    model.compile(optimizer=Adam(learning_rate=0.001), loss='mean_squared_error',
+                  jit_compile=not GPU_AVAILABLE)
+    
+    # Input pipeline: last 10% held out for validation (as validation_split did),
+    # training windows cached, reshuffled every epoch and prefetched
+    split = len(X_train_lstm) - int(len(X_train_lstm) * 0.1)
+    train_ds = (tf.data.Dataset.from_tensor_slices((X_train_lstm[:split], y_train_lstm[:split]))
+                .cache()
+                .shuffle(split)
+                .batch(32)
+                .prefetch(tf.data.AUTOTUNE))
+    val_ds = (tf.data.Dataset.from_tensor_slices((X_train_lstm[split:], y_train_lstm[split:]))
+              .batch(32)
+              .cache()
+              .prefetch(tf.data.AUTOTUNE))
+    
+    # Train model (at most 50 epochs; stop once validation loss stops improving
+    # and keep the best weights, halving the learning rate on plateaus first)
     history = model.fit(
-        X_train_lstm, y_train,
-        batch_size=32,
+        train_ds,
+        validation_data=val_ds,
         epochs=50,
-        validation_split=0.1,
+        callbacks=[
+            EarlyStopping(monitor='val_loss', patience=5, restore_best_weights=True),
+            ReduceLROnPlateau(monitor='val_loss', factor=0.5, patience=3, min_lr=1e-5)
+        ],
         verbose=0
     )
     
@@ -103,43 +185,136 @@ def train_lstm(X_train, y_train, X_test, y_test):
     test_pred = model.predict(X_test_lstm, verbose=0).flatten()
     
     # Metrics
-    metrics = {
-        'train_rmse': np.sqrt(mean_squared_error(y_train, train_pred)),
-        'test_rmse': np.sqrt(mean_squared_error(y_test, test_pred)),
-        'train_mae': mean_absolute_error(y_train, train_pred),
-        'test_mae': mean_absolute_error(y_test, test_pred),
-        'train_r2': r2_score(y_train, train_pred),
-        'test_r2': r2_score(y_test, test_pred)
-    }
+    metrics = evaluate_model(y_train, train_pred, y_test, test_pred)
     
     return model, test_pred, metrics
 
+# Figures are reused between charts (one set per thread, since requests
+# render concurrently); Figure objects avoid pyplot's global state entirely
+_figures = threading.local()
+
+def get_figure(name, figsize):
+    """
+    Return a reusable (fig, ax) pair for a chart, cleared for redrawing
+    
+    Parameters:
+    - name: Chart name (one figure is kept per name and thread)
+    - figsize: Figure size in inches, used when the figure is first created
+    
+    Returns:
+    - tuple: (Figure, Axes)
+    """
+    cached = getattr(_figures, name, None)
+    if cached is None:
+        fig = Figure(figsize=figsize)
+        cached = (fig, fig.add_subplot())
+        setattr(_figures, name, cached)
+    else:
+        cached[1].clear()
+    
+    return cached
+
 def plot_predictions(y_test, predictions_dict, stock_symbol):
     """Create visualization comparing actual vs predicted prices"""
-    plt.figure(figsize=(14, 8))
+    fig, ax = get_figure('predictions', (14, 8))
     
     # Plot actual prices
-    plt.plot(y_test, label='Actual Price', color='black', linewidth=2)
+    ax.plot(y_test, label='Actual Price', color='black', linewidth=2)
     
     # Plot predictions from each model
     colors = ['blue', 'green', 'red']
     for (model_name, pred), color in zip(predictions_dict.items(), colors):
-        plt.plot(pred, label=f'{model_name} Prediction', color=color, alpha=0.7)
+        ax.plot(pred, label=f'{model_name} Prediction', color=color, alpha=0.7)
     
-    plt.title(f'{stock_symbol} - Stock Price Prediction Comparison', fontsize=16)
-    plt.xlabel('Time Steps', fontsize=12)
-    plt.ylabel('Normalized Price', fontsize=12)
-    plt.legend()
-    plt.grid(True, alpha=0.3)
-    plt.tight_layout()
+    ax.set_title(f'{stock_symbol} - Stock Price Prediction Comparison', fontsize=16)
+    ax.set_xlabel('Time Steps', fontsize=12)
+    ax.set_ylabel('Normalized Price', fontsize=12)
+    ax.legend()
+    ax.grid(True, alpha=0.3)
+    fig.tight_layout()
     
     # Save plot
     plot_path = f'static/plots/{stock_symbol}_prediction.png'
-    plt.savefig(plot_path, dpi=100, bbox_inches='tight')
-    plt.close()
+    # tight_layout() already fit the margins, so skip bbox_inches='tight' (a second
+    # render pass just to measure) and the PNG metadata chunks
+    fig.savefig(plot_path, dpi=100, metadata={'Software': None})
     
     return plot_path
 
+@njit(cache=True)
+def _rollout_linear(coef, intercept, sequence, steps):
+    """Autoregressive rollout of a linear model over a sliding window"""
+    window = sequence.copy()
+    predictions = np.empty(steps)
+    
+    for i in range(steps):
+        pred = intercept
+        for j in range(len(window)):
+            pred += coef[j] * window[j]
+        predictions[i] = pred
+        
+        # Slide the window left and append the prediction
+        for j in range(len(window) - 1):
+            window[j] = window[j + 1]
+        window[-1] = pred
+    
+    return predictions
+
+# Cleared (under the lock) the first time XLA fails to compile a rollout on
+# this device, so later forecasts go straight to the plain graph
+ROLLOUT_JIT = True
+_rollout_jit_lock = threading.Lock()
+
+# (window, steps) signature: any window length or step count reuses the trace
+ROLLOUT_SIGNATURE = (tf.TensorSpec(shape=[None], dtype=tf.float32),
+                     tf.TensorSpec(shape=[], dtype=tf.int32))
+
+def _build_lstm_rollout(model, jit_compile):
+    """Trace the autoregressive rollout for one model (optionally XLA-compiled)"""
+    @tf.function(input_signature=ROLLOUT_SIGNATURE, jit_compile=jit_compile)
+    def rollout(seq, steps):
+        preds = tf.TensorArray(tf.float32, size=steps)
+        for i in tf.range(steps):
+            pred = tf.cast(model(tf.reshape(seq, (1, -1, 1)), training=False)[0, 0], tf.float32)
+            preds = preds.write(i, pred)
+            seq = tf.concat([seq[1:], tf.reshape(pred, (1,))], axis=0)
+        return preds.stack()
+    
+    return rollout
+
+def lstm_rollout(model, sequence, steps):
+    """
+    Autoregressively predict the next steps with an LSTM in one graph call
+    
+    Each prediction is appended to the window (and the oldest value dropped)
+    before the next step, exactly like repeated model.predict() calls. The
+    graph is compiled with XLA; if XLA cannot compile the model on this
+    device (e.g. cuDNN LSTM kernels), the plain graph is used instead.
+    
+    Parameters:
+    - model: Trained Keras LSTM taking (1, timesteps, 1) input
+    - sequence: 1D array with the last window of normalized prices
+    - steps: Number of future steps
+    
+    Returns:
+    - array: Normalized predictions, one per step
+    """
+    global ROLLOUT_JIT
+    
+    args = (tf.constant(sequence, dtype=tf.float32), tf.constant(steps, dtype=tf.int32))
+    jit_compile = ROLLOUT_JIT
+    
+    # Built per call: every /predict trains a fresh model, so a graph cached
+    # per model would never be reused and would keep the model alive
+    try:
+        return _build_lstm_rollout(model, jit_compile)(*args).numpy()
+    except (tf.errors.InvalidArgumentError, tf.errors.UnimplementedError):
+        if not jit_compile:
+            raise
+        with _rollout_jit_lock:
+            ROLLOUT_JIT = False
+        return _build_lstm_rollout(model, jit_compile=False)(*args).numpy()
+
 def predict_next_7_days(model, model_name, last_sequence, scaler, feature_names):
     """
     Predict next 7 days of stock prices
@@ -156,31 +331,34 @@ def predict_next_7_days(model, model_name, last_sequence, scaler, feature_names)
     """
     # Get the last 60 days of data
     current_sequence = last_sequence[-1].copy()
-    predictions = []
-    
-    for _ in range(7):
-        if model_name == 'LSTM':
-            # LSTM prediction
-            sequence_reshaped = current_sequence.reshape(1, len(current_sequence), 1)
-            next_pred = model.predict(sequence_reshaped, verbose=0)[0][0]
-        else:
-            # Linear Regression or Random Forest
+    
+    if model_name == 'LSTM':
+        # All 7 steps run inside one traced graph instead of 7 predict() calls
+        predictions = lstm_rollout(model, current_sequence, 7).tolist()
+    elif model_name == 'Linear Regression':
+        # A linear model is a dot product; roll it out in a compiled loop
+        predictions = _rollout_linear(np.asarray(model.coef_, dtype=np.float64),
+                                      float(model.intercept_),
+                                      current_sequence.astype(np.float64), 7).tolist()
+    else:
+        # Random Forest
+        predictions = []
+        
+        for _ in range(7):
             sequence_reshaped = current_sequence.reshape(1, -1)
             next_pred = model.predict(sequence_reshaped)[0]
-        
-        predictions.append(next_pred)
-        
-        # Update sequence for next prediction
-        current_sequence = np.roll(current_sequence, -1)
-        current_sequence[-1] = next_pred
+            predictions.append(next_pred)
+            
+            # Update sequence for next prediction (shift in place)
+            current_sequence[:-1] = current_sequence[1:]
+            current_sequence[-1] = next_pred
     
     # Convert to original scale
-    close_idx = feature_names.index('Close')
-    dummy = np.zeros((len(predictions), len(feature_names)))
-    dummy[:, close_idx] = predictions
-    denormalized = scaler.inverse_transform(dummy)
-    
-    return denormalized[:, close_idx]
+    return inverse_transform_predictions(predictions, scaler, feature_names)
+
+def next_business_days(count):
+    """Return the next `count` NSE trading days after today as a DatetimeIndex"""
+    return next_trading_days(count)
 
 def plot_future_predictions(future_predictions, stock_symbol):
     """
@@ -190,27 +368,16 @@ def plot_future_predictions(future_predictions, stock_symbol):
     - future_predictions: Array of 7 predicted values
     - stock_symbol: Stock ticker symbol
     """
-    from datetime import datetime, timedelta
     import matplotlib.dates as mdates
     
-    plt.figure(figsize=(14, 7))
-    
     # Create dates for next 7 days (excluding weekends for trading days)
-    today = datetime.now()
-    future_dates = []
-    current_date = today
-    
-    while len(future_dates) < 7:
-        current_date += timedelta(days=1)
-        # Skip weekends (5=Saturday, 6=Sunday)
-        if current_date.weekday() < 5:
-            future_dates.append(current_date)
+    future_dates = next_business_days(7).to_pydatetime()
     
     # Format dates for display
     date_labels = [d.strftime('%Y-%m-%d') for d in future_dates]
     
     # Create the plot with dates on x-axis
-    fig, ax = plt.subplots(figsize=(14, 7))
+    fig, ax = get_figure('future', (14, 7))
     
     # Plot with dotted line style
     ax.plot(future_dates, future_predictions, 'o--', color='#667eea', linewidth=2.5, 
@@ -231,7 +398,7 @@ def plot_future_predictions(future_predictions, stock_symbol):
     # Format x-axis to show dates nicely
     ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m-%d'))
     ax.xaxis.set_major_locator(mdates.DayLocator())
-    plt.xticks(rotation=45, ha='right')
+    setp(ax.get_xticklabels(), rotation=45, ha='right')
     
     # Add grid with light styling
     ax.grid(True, alpha=0.2, linestyle='--', linewidth=0.5, color='gray')
@@ -264,12 +431,11 @@ def plot_future_predictions(future_predictions, stock_symbol):
             verticalalignment='bottom', horizontalalignment='right', bbox=props)
     
     # Adjust layout to prevent label cutoff
-    plt.tight_layout()
+    fig.tight_layout()
     
     # Save plot
     plot_path = f'static/plots/{stock_symbol}_future_7days.png'
-    plt.savefig(plot_path, dpi=120, bbox_inches='tight', facecolor='white')
-    plt.close()
+    fig.savefig(plot_path, dpi=120, facecolor='white', metadata={'Software': None})
     
     print(f"Future 7-day prediction chart saved: {plot_path}")
     print(f"Predicted prices: {[f'₹{p:.2f}' for p in future_predictions]}")
@@ -291,10 +457,16 @@ def train_and_predict(processed_data, stock_symbol):
     y_train = processed_data['y_train']
     y_test = processed_data['y_test']
     
-    # Train all models
-    lr_model, lr_pred, lr_metrics = train_linear_regression(X_train, y_train, X_test, y_test)
-    rf_model, rf_pred, rf_metrics = train_random_forest(X_train, y_train, X_test, y_test)
-    lstm_model, lstm_pred, lstm_metrics = train_lstm(X_train, y_train, X_test, y_test)
+    # Train all models concurrently; sklearn and TensorFlow release the GIL in
+    # their native code, so the LSTM trains while the forest is being built
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        lr_future = executor.submit(train_linear_regression, X_train, y_train, X_test, y_test)
+        rf_future = executor.submit(train_random_forest, X_train, y_train, X_test, y_test)
+        lstm_future = executor.submit(train_lstm, X_train, y_train, X_test, y_test)
+        
+        lr_model, lr_pred, lr_metrics = lr_future.result()
+        rf_model, rf_pred, rf_metrics = rf_future.result()
+        lstm_model, lstm_pred, lstm_metrics = lstm_future.result()
     
     # Compare models based on test RMSE
     models_performance = {
@@ -331,15 +503,7 @@ def train_and_predict(processed_data, stock_symbol):
     )
     
     # Generate future dates (skip weekends)
-    from datetime import datetime, timedelta
-    today = datetime.now()
-    future_dates = []
-    current_date = today
-    
-    while len(future_dates) < 7:
-        current_date += timedelta(days=1)
-        if current_date.weekday() < 5:  # Skip weekends
-            future_dates.append(current_date.strftime('%Y-%m-%d'))
+    future_dates = next_business_days(7).strftime('%Y-%m-%d').tolist()
     
     # Create visualization
     plot_path = plot_predictions(
@@ -360,8 +524,8 @@ def train_and_predict(processed_data, stock_symbol):
     if best_model == 'LSTM':
         lstm_model.save(f'model/saved_model_{stock_symbol}.h5')
     else:
-        with open(model_path, 'wb') as f:
-            pickle.dump(best_model_obj, f)
+        # joblib writes the trees' numpy arrays as raw buffers; lz4 keeps it fast
+        joblib.dump(best_model_obj, model_path, compress=('lz4', 3), protocol=5)
     
     print(f"\nBest Model: {best_model}")
     print(f"Test RMSE: {models_performance[best_model]:.6f}")
@@ -5,6 +5,13 @@ Run this after setting up database and dependencies
 
 import os
 import sys
+from importlib.metadata import distribution, PackageNotFoundError
+
+# Import name -> installed distribution name, where they differ
+DISTRIBUTION_NAMES = {
+    'sklearn': 'scikit-learn',
+    'mysql': 'mysql-connector-python'
+}
 
 def check_dependencies():
     """Check if all required packages are installed"""
@@ -14,12 +21,14 @@ def check_dependencies():
         'tensorflow', 'matplotlib', 'yfinance', 'mysql'
     ]
     
+    # Look packages up in the installed metadata rather than importing them
+    # (importing tensorflow alone takes seconds)
     missing = []
     for package in required_packages:
         try:
-            __import__(package)
+            distribution(DISTRIBUTION_NAMES.get(package, package))
             print(f"✓ {package}")
-        except ImportError:
+        except PackageNotFoundError:
             print(f"✗ {package} - MISSING")
             missing.append(package)
     
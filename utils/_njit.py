@@ -0,0 +1,17 @@
+"""
+Optional Numba JIT
+Compiles numeric kernels with numba when it is installed; without it the
+decorated functions run as plain Python over numpy arrays
+"""
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    
+    def njit(*args, **kwargs):
+        """No-op stand-in for numba.njit (supports both @njit and @njit(...))"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
@@ -1,8 +1,144 @@
 import yfinance as yf
 import pandas as pd
+import atexit
+import logging
+import os
+import re
+import requests
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from datetime import datetime, timedelta
 
-def fetch_stock_data(stock_symbol, period='2y'):
+from utils.indian_stocks import NSE_BASE_SYMBOLS, POPULAR_NSE_STOCKS, SYMBOL_TO_SECTOR
+
+logger = logging.getLogger(__name__)
+
+# Yahoo's spark endpoint returns quotes for up to 20 symbols per request
+SPARK_URL = 'https://query1.finance.yahoo.com/v8/finance/spark'
+SPARK_MAX_SYMBOLS = 20
+SPARK_MAX_WORKERS = 4
+
+# Lightweight symbol lookup (names/exchange only, no quote summary)
+QUOTE_TYPE_URL = 'https://query2.finance.yahoo.com/v1/finance/quoteType/{symbol}'
+
+# Optional on-disk HTTP cache (requests-cache); without it requests go straight to Yahoo
+try:
+    import requests_cache
+    REQUESTS_CACHE_AVAILABLE = True
+except ImportError:
+    REQUESTS_CACHE_AVAILABLE = False
+
+# SQLite file for the on-disk cache, shared by workers and kept across restarts
+YAHOO_CACHE_PATH = os.getenv('YAHOO_CACHE_PATH', os.path.join('.cache', 'yahoo'))
+
+def _create_yahoo_session():
+    """
+    Create the shared Yahoo session
+    
+    With requests-cache installed, quoteType lookups (company names) are
+    persisted to disk for a day; quotes are never cached since they're live.
+    """
+    if not REQUESTS_CACHE_AVAILABLE:
+        return requests.Session()
+    
+    os.makedirs(os.path.dirname(YAHOO_CACHE_PATH) or '.', exist_ok=True)
+    return requests_cache.CachedSession(
+        YAHOO_CACHE_PATH,
+        backend='sqlite',
+        expire_after=requests_cache.DO_NOT_CACHE,
+        urls_expire_after={'query2.finance.yahoo.com/v1/finance/quoteType': timedelta(days=1)},
+        allowable_codes=(200,)
+    )
+
+# Shared session so Yahoo requests reuse TCP/TLS connections across handlers.
+# (yfinance keeps its own process-wide session for Ticker calls; current
+# releases only accept a curl_cffi session there, so it can't be cached this way.)
+yahoo_session = _create_yahoo_session()
+yahoo_session.headers.update({'User-Agent': 'Mozilla/5.0'})
+yahoo_session.mount('https://', HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=32,
+    max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=(429, 500, 502, 503, 504))
+))
+atexit.register(yahoo_session.close)
+
+# Matches input starting with a known NSE symbol in one C-level regex match
+# (longest symbols first so the longest alternative wins)
+_NSE_PREFIX_RE = re.compile('|'.join(map(re.escape, sorted(NSE_BASE_SYMBOLS, key=len, reverse=True))))
+
+# In-process memo of recent lookups, so repeated requests for the same symbol
+# inside one worker skip the Yahoo round-trip. Entries expire after a few
+# minutes so intraday bars and quotes don't go stale.
+MEMO_SECONDS = 300
+MEMO_MAX_ENTRIES = 256
+_ticker_cache = {}
+_history_cache = {}
+_info_cache = {}
+_missing_cache = {}
+_memo_lock = threading.Lock()
+
+def _memo_get(memo, key):
+    """Return a fresh memoized value, or None if missing/expired"""
+    with _memo_lock:
+        entry = memo.get(key)
+    if entry is None or time.monotonic() - entry[0] > MEMO_SECONDS:
+        return None
+    return entry[1]
+
+def _memo_set(memo, key, value):
+    """Store a value in a memo dict with the current timestamp"""
+    with _memo_lock:
+        # Arbitrary user-typed symbols shouldn't grow the memo without bound
+        if len(memo) >= MEMO_MAX_ENTRIES:
+            memo.clear()
+        memo[key] = (time.monotonic(), value)
+
+def _get_ticker(stock_symbol):
+    """Get a yf.Ticker for a symbol, reusing the one built earlier in this process"""
+    ticker = _ticker_cache.get(stock_symbol)
+    if ticker is None:
+        if len(_ticker_cache) >= MEMO_MAX_ENTRIES:
+            _ticker_cache.clear()
+        ticker = _ticker_cache.setdefault(stock_symbol, yf.Ticker(stock_symbol))
+    return ticker
+
+# Columns of every history frame, in order
+HISTORY_COLUMNS = ['Date', 'Open', 'High', 'Low', 'Close', 'Volume']
+
+def _normalize_history(frame):
+    """
+    Bring a Ticker.history() or yf.download() frame to the one shape both
+    fetch paths memoize and return
+    
+    - Date is a column of tz-naive exchange-local timestamps (download() drops
+      the timezone, history() keeps it)
+    - Prices are float64 and Volume is int64 (download() can return it as float)
+    - Plain RangeIndex and unnamed column index
+    """
+    frame = frame.reset_index()[HISTORY_COLUMNS].copy()
+    frame.columns.name = None
+    
+    if frame['Date'].dt.tz is not None:
+        frame['Date'] = frame['Date'].dt.tz_localize(None)
+    
+    # A missing volume counts as no trades, as Yahoo reports for quiet sessions
+    frame['Volume'] = frame['Volume'].fillna(0)
+    return frame.astype({'Open': 'float64', 'High': 'float64', 'Low': 'float64',
+                         'Close': 'float64', 'Volume': 'int64'})
+
+def _with_price_dtype(stock_data, dtype):
+    """Copy of OHLCV data with prices cast to dtype and Volume downcast to the smallest fitting int"""
+    if dtype is None:
+        return stock_data.copy()
+    
+    stock_data = stock_data.astype({'Open': dtype, 'High': dtype, 'Low': dtype, 'Close': dtype})
+    stock_data['Volume'] = pd.to_numeric(stock_data['Volume'], downcast='unsigned')
+    return stock_data
+
+def fetch_stock_data(stock_symbol, period='2y', dtype=None):
     """
     Fetch historical stock data from Yahoo Finance
     Automatically formats Indian stock symbols with .NS suffix if needed
@@ -10,6 +146,8 @@ def fetch_stock_data(stock_symbol, period='2y'):
     Parameters:
     - stock_symbol: Stock ticker symbol (e.g., 'AAPL', 'RELIANCE', 'RELIANCE.NS')
     - period: Time period for historical data (default: 2 years)
+    - dtype: Price dtype, e.g. 'float32' to halve memory when holding many
+      symbols (default: None keeps float64 and int64 Volume)
     
     Returns:
     - DataFrame with stock data or None if error
@@ -19,84 +157,312 @@ def fetch_stock_data(stock_symbol, period='2y'):
         original_symbol = stock_symbol
         stock_symbol = stock_symbol.strip().upper()
         
+        # Serve repeats from memory; hand out a copy so callers can't mutate the memo
+        cache_key = (stock_symbol, period)
+        cached = _memo_get(_history_cache, cache_key)
+        if cached is not None:
+            return _with_price_dtype(cached, dtype)
+        
+        # Symbols that recently had no data on either exchange
+        if _memo_get(_missing_cache, cache_key):
+            logger.debug("No data found for %s (recently checked)", stock_symbol)
+            return None
+        
         # If no suffix and looks like Indian stock, add .NS
         if '.' not in stock_symbol:
-            # List of common Indian stock prefixes (you can expand this)
-            indian_stocks = ['RELIANCE', 'TCS', 'INFY', 'HDFCBANK', 'ICICIBANK', 
-                           'SBIN', 'BHARTIARTL', 'ITC', 'HINDUNILVR', 'KOTAKBANK',
-                           'LT', 'AXISBANK', 'ASIANPAINT', 'MARUTI', 'WIPRO',
-                           'TATASTEEL', 'SUNPHARMA', 'TITAN', 'BAJFINANCE', 'TECHM',
-                           'NESTLEIND', 'ULTRACEMCO', 'ONGC', 'NTPC', 'POWERGRID',
-                           'M&M', 'ADANIPORTS', 'COALINDIA', 'DRREDDY', 'EICHERMOT']
-            
-            if any(stock_symbol.startswith(prefix) for prefix in indian_stocks):
+            # Starts with a common Indian stock symbol (e.g. RELIANCE, RELIANCE-EQ)
+            if _NSE_PREFIX_RE.match(stock_symbol):
                 stock_symbol = f"{stock_symbol}.NS"
-                print(f"Auto-formatted to Indian NSE symbol: {stock_symbol}")
+                logger.debug("Auto-formatted to Indian NSE symbol: %s", stock_symbol)
         
         # Create ticker object
-        ticker = yf.Ticker(stock_symbol)
+        ticker = _get_ticker(stock_symbol)
         
         # Fetch historical data
         stock_data = ticker.history(period=period)
         
         if stock_data.empty:
-            print(f"No data found for {stock_symbol}")
+            logger.info("No data found for %s", stock_symbol)
             
             # If .NS didn't work, try .BO
             if stock_symbol.endswith('.NS'):
                 bo_symbol = stock_symbol.replace('.NS', '.BO')
-                print(f"Trying BSE symbol: {bo_symbol}")
-                ticker = yf.Ticker(bo_symbol)
+                logger.debug("Trying BSE symbol: %s", bo_symbol)
+                ticker = _get_ticker(bo_symbol)
                 stock_data = ticker.history(period=period)
                 
                 if not stock_data.empty:
                     stock_symbol = bo_symbol
-                    print(f"Found data with BSE symbol: {bo_symbol}")
+                    logger.debug("Found data with BSE symbol: %s", bo_symbol)
             
             if stock_data.empty:
+                _memo_set(_missing_cache, cache_key, True)
                 return None
         
-        # Reset index to make Date a column
-        stock_data.reset_index(inplace=True)
-        
-        # Select relevant columns
-        stock_data = stock_data[['Date', 'Open', 'High', 'Low', 'Close', 'Volume']]
+        # Date as a column, same shape as fetch_many_stock_data() frames
+        stock_data = _normalize_history(stock_data)
         
-        print(f"Successfully fetched {len(stock_data)} records for {stock_symbol}")
-        return stock_data
+        logger.debug("Successfully fetched %d records for %s", len(stock_data), stock_symbol)
+        _memo_set(_history_cache, cache_key, stock_data)
+        return _with_price_dtype(stock_data, dtype)
     
     except Exception as e:
-        print(f"Error fetching data for {stock_symbol}: {e}")
+        logger.warning("Error fetching data for %s: %s", stock_symbol, e)
         return None
 
-def get_stock_info(stock_symbol):
+def get_stock_info(stock_symbol, include_details=False):
     """
     Get additional stock information
     
+    Price and market cap come from ticker.fast_info, and the name/sector of
+    popular Indian stocks from the local tables. The full ticker.info quote
+    summary (the slowest yfinance call) is only fetched with include_details.
+    
     Parameters:
     - stock_symbol: Stock ticker symbol
+    - include_details: Also fetch sector/industry/long name from ticker.info
     
     Returns:
     - Dictionary with stock info
     """
     try:
-        ticker = yf.Ticker(stock_symbol)
-        info = ticker.info
-        
-        return {
-            'name': info.get('longName', stock_symbol),
-            'sector': info.get('sector', 'N/A'),
-            'industry': info.get('industry', 'N/A'),
-            'market_cap': info.get('marketCap', 'N/A'),
-            'current_price': info.get('currentPrice', 'N/A')
+        stock_symbol = stock_symbol.strip().upper()
+        cache_key = (stock_symbol, include_details)
+        cached = _memo_get(_info_cache, cache_key)
+        if cached is not None:
+            return dict(cached)
+        
+        ticker = _get_ticker(stock_symbol)
+        fast_info = ticker.fast_info
+        
+        stock_info = {
+            'name': (POPULAR_NSE_STOCKS.get(stock_symbol)
+                     or fetch_quote_type_name(stock_symbol) or stock_symbol),
+            'sector': SYMBOL_TO_SECTOR.get(stock_symbol, 'N/A'),
+            'industry': 'N/A',
+            'market_cap': fast_info.market_cap or 'N/A',
+            'current_price': fast_info.last_price or 'N/A'
         }
+        
+        if include_details:
+            info = ticker.info
+            stock_info['name'] = info.get('longName', stock_info['name'])
+            stock_info['sector'] = info.get('sector', stock_info['sector'])
+            stock_info['industry'] = info.get('industry', 'N/A')
+        
+        _memo_set(_info_cache, cache_key, stock_info)
+        return dict(stock_info)
     
     except Exception as e:
-        print(f"Error fetching stock info: {e}")
+        logger.warning("Error fetching stock info: %s", e)
         return None
 
+def fetch_quote_type_name(stock_symbol, timeout=2):
+    """
+    Get a stock's display name from Yahoo's quoteType endpoint
+    
+    Much cheaper than yfinance's ticker.info, which downloads the full quote summary.
+    
+    Parameters:
+    - stock_symbol: Stock ticker symbol
+    - timeout: Request timeout in seconds
+    
+    Returns:
+    - str: Long name (or short name), or None if unavailable
+    """
+    try:
+        response = yahoo_session.get(QUOTE_TYPE_URL.format(symbol=stock_symbol), timeout=timeout)
+        response.raise_for_status()
+        result = response.json()['quoteType']['result'][0]
+        return result.get('longName') or result.get('shortName')
+    
+    except (requests.RequestException, ValueError, KeyError, IndexError, TypeError) as e:
+        logger.warning("Error fetching quote type for %s: %s", stock_symbol, e)
+        return None
+
+def _fetch_spark_chunk(chunk, timeout):
+    """Fetch quotes for up to SPARK_MAX_SYMBOLS symbols in one spark request"""
+    quotes = {}
+    
+    try:
+        response = yahoo_session.get(SPARK_URL, params={
+            'symbols': ','.join(chunk),
+            'range': '1d',
+            'interval': '1m',
+            'indicators': 'close'
+        }, timeout=timeout)
+        response.raise_for_status()
+        results = response.json().get('spark', {}).get('result') or []
+    
+    except (requests.RequestException, ValueError) as e:
+        logger.warning("Error fetching spark quotes for %s: %s", chunk, e)
+        return quotes
+    
+    for result in results:
+        try:
+            data = result['response'][0]
+            meta = data['meta']
+            
+            price = meta.get('regularMarketPrice')
+            if price is None:
+                # Fall back to the last non-empty close in the series
+                closes = data['indicators']['quote'][0]['close']
+                price = next(c for c in reversed(closes) if c is not None)
+            
+            previous_close = meta.get('previousClose') or meta.get('chartPreviousClose') or price
+            
+            quotes[result['symbol']] = {
+                'price': float(price),
+                'previousClose': float(previous_close)
+            }
+        
+        except (KeyError, IndexError, TypeError, StopIteration):
+            # Leave the symbol out so the caller can fall back to yfinance
+            continue
+    
+    return quotes
+
+def iter_spark_quotes(symbols, timeout=5):
+    """
+    Yield spark quotes one chunk at a time, in the order the requests complete
+    
+    Parameters:
+    - symbols: List of ticker symbols
+    - timeout: Per-request timeout in seconds
+    
+    Yields:
+    - Dictionary {symbol: {'price': float, 'previousClose': float}} per chunk
+    """
+    chunks = [symbols[start:start + SPARK_MAX_SYMBOLS]
+              for start in range(0, len(symbols), SPARK_MAX_SYMBOLS)]
+    
+    if len(chunks) <= 1:
+        for chunk in chunks:
+            yield _fetch_spark_chunk(chunk, timeout)
+        return
+    
+    # Large batches: issue the spark requests concurrently
+    with ThreadPoolExecutor(max_workers=min(SPARK_MAX_WORKERS, len(chunks))) as executor:
+        futures = [executor.submit(_fetch_spark_chunk, chunk, timeout) for chunk in chunks]
+        for future in as_completed(futures):
+            yield future.result()
+
+def fetch_spark_quotes(symbols, timeout=5):
+    """
+    Get latest price and previous close for many symbols in few requests
+    
+    Parameters:
+    - symbols: List of ticker symbols
+    - timeout: Per-request timeout in seconds
+    
+    Returns:
+    - Dictionary {symbol: {'price': float, 'previousClose': float}}
+      Symbols missing from Yahoo's response are left out
+    """
+    quotes = {}
+    for chunk_quotes in iter_spark_quotes(symbols, timeout):
+        quotes.update(chunk_quotes)
+    return quotes
+
+def fetch_download_quotes(symbols):
+    """
+    Get latest close and previous close for many symbols with one yf.download call
+    
+    Parameters:
+    - symbols: List of ticker symbols
+    
+    Returns:
+    - Dictionary {symbol: {'price': float, 'previousClose': float}}
+      Symbols without data are left out
+    """
+    quotes = {}
+    
+    try:
+        # A few days of daily bars so weekends/holidays still leave a previous close
+        data = yf.download(symbols, period='5d', interval='1d', group_by='ticker',
+                           threads=True, progress=False)
+    except Exception as e:
+        logger.warning("Error downloading prices for %s: %s", symbols, e)
+        return quotes
+    
+    if data is None or data.empty:
+        return quotes
+    
+    for symbol in symbols:
+        try:
+            frame = data[symbol] if isinstance(data.columns, pd.MultiIndex) else data
+            closes = frame['Close'].dropna()
+        except KeyError:
+            continue
+        
+        if closes.empty:
+            continue
+        
+        price = float(closes.iloc[-1])
+        quotes[symbol] = {
+            'price': price,
+            'previousClose': float(closes.iloc[-2]) if len(closes) > 1 else price
+        }
+    
+    return quotes
+
+def fetch_many_stock_data(symbols, period='1y'):
+    """
+    Fetch historical data for many symbols with one yf.download call
+    
+    Parameters:
+    - symbols: List of full ticker symbols (e.g., 'RELIANCE.NS')
+    - period: Time period for historical data (default: 1 year)
+    
+    Returns:
+    - Dictionary {symbol: DataFrame} with the same columns as fetch_stock_data()
+      Symbols without data are left out
+    """
+    history = {}
+    
+    # Symbols fetched recently (by either path) come from the memo; only the
+    # rest go into the batch download
+    missing = []
+    for symbol in dict.fromkeys(symbols):
+        cached = _memo_get(_history_cache, (symbol, period))
+        if cached is not None:
+            history[symbol] = cached.copy()
+        else:
+            missing.append(symbol)
+    
+    if not missing:
+        return history
+    
+    try:
+        # auto_adjust matches Ticker.history(), which fetch_stock_data() uses
+        data = yf.download(missing, period=period, group_by='ticker', auto_adjust=True,
+                           threads=True, progress=False)
+    except Exception as e:
+        logger.warning("Error downloading history for %s: %s", missing, e)
+        return history
+    
+    if data is None or data.empty:
+        return history
+    
+    for symbol in missing:
+        try:
+            frame = data[symbol] if isinstance(data.columns, pd.MultiIndex) else data
+            frame = frame.dropna(subset=['Close'])
+        except KeyError:
+            continue
+        
+        if frame.empty:
+            continue
+        
+        frame = _normalize_history(frame)
+        _memo_set(_history_cache, (symbol, period), frame)
+        history[symbol] = frame.copy()
+    
+    return history
+
 if __name__ == "__main__":
     # Test the function
+    logging.basicConfig(level=logging.DEBUG)
     test_symbol = "AAPL"
     data = fetch_stock_data(test_symbol)
     
@@ -104,6 +470,6 @@ if __name__ == "__main__":
         print(f"\nFirst 5 rows of {test_symbol} data:")
         print(data.head())
         
-        info = get_stock_info(test_symbol)
+        info = get_stock_info(test_symbol, include_details=True)
         print(f"\nStock Information:")
         print(info)
\ No newline at end of file
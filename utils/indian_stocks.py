@@ -3,6 +3,15 @@ Indian Stock Market Helper Utilities
 Provides validation and information for NSE/BSE stocks
 """
 
+import bisect
+import logging
+import os
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
 # Popular Indian stocks with their full names
 POPULAR_NSE_STOCKS = {
     'RELIANCE.NS': 'Reliance Industries Limited',
@@ -37,6 +46,67 @@ POPULAR_NSE_STOCKS = {
     'EICHERMOT.NS': 'Eicher Motors Limited',
 }
 
+# Bare NSE symbols (no suffix), for recognizing Indian stocks typed without .NS
+NSE_BASE_SYMBOLS = frozenset(symbol[:-len('.NS')] for symbol in POPULAR_NSE_STOCKS)
+
+# Suggestion index: symbols sorted for prefix range search, ranked by popularity
+SUGGESTION_SYMBOLS = sorted(POPULAR_NSE_STOCKS)
+SYMBOL_POPULARITY = {symbol: rank for rank, symbol in enumerate(POPULAR_NSE_STOCKS)}
+DEFAULT_SUGGESTIONS = tuple(POPULAR_NSE_STOCKS)[:10]
+
+# NSE trading holidays that fall on weekdays, by year (from NSE's published
+# calendars). Years not listed are checked for weekends only, with a warning;
+# add new calendars through NSE_HOLIDAYS_FILE without a code change.
+NSE_HOLIDAYS_BY_YEAR = {
+    2024: frozenset({
+        date(2024, 1, 22), date(2024, 1, 26), date(2024, 3, 8), date(2024, 3, 25),
+        date(2024, 3, 29), date(2024, 4, 11), date(2024, 4, 17), date(2024, 5, 1),
+        date(2024, 5, 20), date(2024, 6, 17), date(2024, 7, 17), date(2024, 8, 15),
+        date(2024, 10, 2), date(2024, 11, 1), date(2024, 11, 15), date(2024, 11, 20),
+        date(2024, 12, 25),
+    }),
+    2025: frozenset({
+        date(2025, 2, 26), date(2025, 3, 14), date(2025, 3, 31), date(2025, 4, 10),
+        date(2025, 4, 14), date(2025, 4, 18), date(2025, 5, 1), date(2025, 8, 15),
+        date(2025, 8, 27), date(2025, 10, 2), date(2025, 10, 21), date(2025, 10, 22),
+        date(2025, 11, 5), date(2025, 12, 25),
+    }),
+}
+
+# Optional file of extra holidays, one YYYY-MM-DD per line ('#' starts a comment)
+NSE_HOLIDAYS_FILE = os.getenv('NSE_HOLIDAYS_FILE')
+
+def _load_holidays_file(path):
+    """Read extra holidays from path, grouped by year"""
+    by_year = {}
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.split('#', 1)[0].strip()
+            if line:
+                day = date.fromisoformat(line)
+                by_year.setdefault(day.year, set()).add(day)
+    return by_year
+
+if NSE_HOLIDAYS_FILE:
+    try:
+        for _year, _days in _load_holidays_file(NSE_HOLIDAYS_FILE).items():
+            NSE_HOLIDAYS_BY_YEAR[_year] = NSE_HOLIDAYS_BY_YEAR.get(_year, frozenset()) | _days
+    except (OSError, ValueError) as e:
+        logger.warning("Could not load NSE holidays from %s: %s", NSE_HOLIDAYS_FILE, e)
+
+NSE_HOLIDAYS = frozenset().union(*NSE_HOLIDAYS_BY_YEAR.values())
+
+# Years already reported as missing from the holiday calendar
+_warned_holiday_years = set()
+
+def _check_holiday_calendar(*years):
+    """Warn (once per year) when a year has no NSE holiday calendar"""
+    for year in years:
+        if year not in NSE_HOLIDAYS_BY_YEAR and year not in _warned_holiday_years:
+            _warned_holiday_years.add(year)
+            logger.warning("No NSE holiday calendar for %d; only weekends are treated "
+                           "as non-trading days (set NSE_HOLIDAYS_FILE)", year)
+
 # Sector classification
 SECTORS = {
     'Banking & Finance': ['HDFCBANK.NS', 'ICICIBANK.NS', 'SBIN.NS', 'KOTAKBANK.NS', 
@@ -50,6 +120,9 @@ SECTORS = {
     'Telecom': ['BHARTIARTL.NS'],
 }
 
+# Reverse index of SECTORS for constant-time sector lookups
+SYMBOL_TO_SECTOR = {symbol: sector for sector, stocks in SECTORS.items() for symbol in stocks}
+
 def validate_indian_stock_symbol(symbol):
     """
     Validate if the symbol is properly formatted for Indian stocks
@@ -97,10 +170,7 @@ def get_stock_info(symbol):
 
 def get_sector(symbol):
     """Get sector for a stock symbol"""
-    for sector, stocks in SECTORS.items():
-        if symbol in stocks:
-            return sector
-    return 'Other'
+    return SYMBOL_TO_SECTOR.get(symbol.upper(), 'Other')
 
 def get_popular_stocks_by_sector():
     """Get stocks organized by sector"""
@@ -120,13 +190,13 @@ def get_stock_suggestions(partial_symbol=''):
     
     if not partial:
         # Return top 10 most popular stocks
-        return list(POPULAR_NSE_STOCKS.keys())[:10]
+        return list(DEFAULT_SUGGESTIONS)
     
-    # Filter stocks that start with the partial symbol
-    suggestions = [
-        symbol for symbol in POPULAR_NSE_STOCKS.keys() 
-        if symbol.startswith(partial) or symbol.replace('.NS', '').startswith(partial)
-    ]
+    # Stocks starting with the partial symbol form one contiguous range of the
+    # sorted index (a bare-symbol prefix is also a prefix of the .NS symbol)
+    start = bisect.bisect_left(SUGGESTION_SYMBOLS, partial)
+    end = bisect.bisect_left(SUGGESTION_SYMBOLS, partial + '\uffff', start)
+    suggestions = sorted(SUGGESTION_SYMBOLS[start:end], key=SYMBOL_POPULARITY.get)
     
     return suggestions[:10]
 
@@ -164,26 +234,45 @@ def get_market_indices():
 def is_trading_day(date=None):
     """
     Check if a given date is a trading day in India
-    (Excludes weekends - Saturday and Sunday)
+    (Excludes weekends and the NSE holidays in NSE_HOLIDAYS_BY_YEAR)
     
     Parameters:
-    - date: datetime object (default: today)
+    - date: date or datetime object (default: today)
     
     Returns:
     - bool: True if trading day
     """
-    from datetime import datetime
-    
     if date is None:
         date = datetime.now()
+    if isinstance(date, datetime):
+        date = date.date()
+    
+    _check_holiday_calendar(date.year)
+    
+    # 5=Saturday, 6=Sunday
+    return date.weekday() < 5 and date not in NSE_HOLIDAYS
+
+def next_trading_days(count, after=None):
+    """
+    Get the next trading days after a date
+    
+    Parameters:
+    - count: Number of trading days
+    - after: date or datetime to start after (default: today)
+    
+    Returns:
+    - pd.DatetimeIndex: The next `count` weekdays that are not NSE holidays
+    """
+    if after is None:
+        after = datetime.now()
+    if isinstance(after, datetime):
+        after = after.date()
     
-    # Weekend check
-    if date.weekday() >= 5:  # 5=Saturday, 6=Sunday
-        return False
+    start = after + timedelta(days=1)
+    # Generous bound on the calendar span the range can reach
+    _check_holiday_calendar(*range(start.year, (start + timedelta(days=2 * count + 14)).year + 1))
     
-    # Note: Indian market holidays not checked here
-    # For production, integrate with NSE holiday calendar
-    return True
+    return pd.bdate_range(start=start, periods=count, freq='C', holidays=sorted(NSE_HOLIDAYS))
 
 def get_market_timings():
     """Get Indian stock market timings"""
@@ -0,0 +1,41 @@
+"""
+orjson-backed JSON Provider for Flask
+Serializes API responses with orjson instead of the stdlib json module
+"""
+
+from datetime import date, datetime
+from decimal import Decimal
+
+import orjson
+from flask.json.provider import JSONProvider
+
+# numpy/pandas scalars and non-str dict keys are serialized natively
+ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+def _default(obj):
+    """Serialize types orjson does not handle itself (e.g. MySQL DECIMAL columns, pd.Timestamp)"""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    # orjson only handles exact datetime/date instances, not subclasses such as pd.Timestamp
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+class OrjsonProvider(JSONProvider):
+    """JSON provider used by jsonify(), request.get_json() and the |tojson filter"""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=_default, option=ORJSON_OPTIONS).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        # Build the body as bytes directly, skipping the str round trip
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=_default, option=ORJSON_OPTIONS),
+            mimetype='application/json'
+        )
@@ -3,10 +3,87 @@ Stock Market News Fetcher
 Fetches latest news from various sources for Indian and global markets
 """
 
+import heapq
+import logging
 import requests
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+import pandas as pd
 import yfinance as yf
-import json
+
+from utils.indian_stocks import POPULAR_NSE_STOCKS
+
+logger = logging.getLogger(__name__)
+
+# Process-level TTL cache for Yahoo lookups, with a lifetime per kind of data
+NEWS_TTL_SECONDS = 600
+HISTORY_TTL_SECONDS = 120
+DATA_CACHE_MAX_ENTRIES = 256
+_data_cache = {}
+_data_cache_lock = threading.Lock()
+
+def _cached_call(key, ttl, fetch):
+    """Return fetch()'s result, reusing it for ttl seconds (errors are not cached)"""
+    with _data_cache_lock:
+        entry = _data_cache.get(key)
+    if entry is not None and time.monotonic() - entry[0] < ttl:
+        return entry[1]
+    
+    value = fetch()
+    with _data_cache_lock:
+        # Per-stock news lookups take arbitrary symbols; don't grow without bound
+        if len(_data_cache) >= DATA_CACHE_MAX_ENTRIES:
+            _data_cache.clear()
+        _data_cache[key] = (time.monotonic(), value)
+    return value
+
+def cached_news(symbol):
+    """yf.Ticker(symbol).news, cached for NEWS_TTL_SECONDS"""
+    return _cached_call(('news', symbol), NEWS_TTL_SECONDS, lambda: yf.Ticker(symbol).news)
+
+def cached_history(symbol, period):
+    """yf.Ticker(symbol).history(period=period), cached for HISTORY_TTL_SECONDS (read-only)"""
+    return _cached_call(('history', symbol, period), HISTORY_TTL_SECONDS,
+                        lambda: yf.Ticker(symbol).history(period=period))
+
+def cached_daily_bars(symbols):
+    """
+    Last few daily bars for many symbols from one yf.download call, cached
+    for HISTORY_TTL_SECONDS (read-only)
+    
+    Parameters:
+    - symbols: Tuple of ticker symbols
+    
+    Returns:
+    - Dictionary {symbol: DataFrame}; symbols without data are left out
+    """
+    def download():
+        # A few days so weekends/holidays still leave a previous close
+        data = yf.download(list(symbols), period='5d', interval='1d', group_by='ticker',
+                           threads=True, progress=False)
+        bars = {}
+        if data is None or data.empty:
+            return bars
+        
+        for symbol in symbols:
+            try:
+                frame = data[symbol] if isinstance(data.columns, pd.MultiIndex) else data
+                frame = frame.dropna(subset=['Close'])
+            except KeyError:
+                continue
+            if not frame.empty:
+                bars[symbol] = frame
+        return bars
+    
+    return _cached_call(('daily_bars', symbols), HISTORY_TTL_SECONDS, download)
+
+def _last_close_and_previous(frame):
+    """Latest close and the close before it (same value if there's only one bar)"""
+    closes = frame['Close']
+    current = float(closes.iloc[-1])
+    return current, float(closes.iloc[-2]) if len(closes) > 1 else current
 
 def safe_get_thumbnail(item):
     """Safely extract thumbnail URL from news item"""
@@ -43,22 +120,20 @@ def get_stock_news_yfinance(stock_symbol, limit=10):
     - list: News articles
     """
     try:
-        print(f"Fetching news for {stock_symbol}...")
-        ticker = yf.Ticker(stock_symbol)
-        
+        logger.debug("Fetching news for %s...", stock_symbol)
         # Try to get news
         try:
-            news = ticker.news
+            news = cached_news(stock_symbol)
         except AttributeError:
             # If .news doesn't work, try getting info
-            print(f"Using alternative method for {stock_symbol}")
+            logger.debug("Using alternative method for %s", stock_symbol)
             news = []
         
         if not news or len(news) == 0:
-            print(f"No news found for {stock_symbol}, using placeholder")
+            logger.info("No news found for %s, using placeholder", stock_symbol)
             return get_placeholder_stock_news(stock_symbol, limit)
         
-        print(f"Found {len(news)} news items for {stock_symbol}")
+        logger.debug("Found %d news items for %s", len(news), stock_symbol)
         
         formatted_news = []
         for item in news[:limit]:
@@ -77,7 +152,7 @@ def get_stock_news_yfinance(stock_symbol, limit=10):
                     'category': 'Stock News'
                 })
             except Exception as e:
-                print(f"Error parsing news item: {e}")
+                logger.warning("Error parsing news item: %s", e)
                 continue
         
         if len(formatted_news) == 0:
@@ -86,7 +161,7 @@ def get_stock_news_yfinance(stock_symbol, limit=10):
         return formatted_news
     
     except Exception as e:
-        print(f"Error fetching news for {stock_symbol}: {e}")
+        logger.warning("Error fetching news for %s: %s", stock_symbol, e)
         return get_placeholder_stock_news(stock_symbol, limit)
 
 def get_placeholder_stock_news(stock_symbol, limit=5):
@@ -116,6 +191,60 @@ def get_placeholder_stock_news(stock_symbol, limit=5):
     
     return placeholder
 
+# Market news sources are fetched concurrently (one ticker.news request each)
+NEWS_MAX_WORKERS = 8
+
+def _fetch_source_news(symbol, name, category):
+    """
+    Fetch up to 3 news items from one market news source
+    
+    Parameters:
+    - symbol: Ticker symbol to read news from
+    - name: Display name of the source
+    - category: News category for the source's items
+    
+    Returns:
+    - tuple: (found_news, list of news items)
+    """
+    logger.debug("Trying to fetch news from %s (%s)...", name, symbol)
+    
+    # ticker.news fails cleanly for invalid symbols, so no ticker.info check first
+    try:
+        ticker_news = cached_news(symbol)
+    except Exception:
+        logger.debug("No news available from %s", name)
+        return False, []
+    
+    if not ticker_news:
+        return False, []
+    
+    logger.debug("Found %d news items from %s", len(ticker_news), name)
+    
+    news_items = []
+    for item in ticker_news[:3]:  # Get up to 3 news from each source
+        try:
+            title = item.get('title', '')
+            
+            # Skip if no title or title is too short
+            if not title or len(title) < 10:
+                continue
+            
+            news_items.append({
+                'title': title,
+                'publisher': item.get('publisher', 'Financial News'),
+                'link': item.get('link', f'https://finance.yahoo.com/quote/{symbol}'),
+                'published': safe_get_time(item),
+                'thumbnail': safe_get_thumbnail(item),
+                'source': name,
+                'category': category
+            })
+        
+        except Exception as e:
+            logger.warning("Error parsing news from %s: %s", name, e)
+            continue
+    
+    return True, news_items
+
 def get_indian_market_news():
     """
     Get latest real Indian market news from multiple sources
@@ -123,11 +252,65 @@ def get_indian_market_news():
     Returns:
     - list: News articles
     """
-    print("Fetching latest Indian market news...")
+    logger.debug("Fetching latest Indian market news...")
     news_items = []
     
-    # Comprehensive list of Indian market sources
-    sources = [
+    # Fetch every source at once; results are read back in source order so
+    # the duplicate check below keeps the same item regardless of timing
+    with ThreadPoolExecutor(max_workers=NEWS_MAX_WORKERS) as executor:
+        futures = [executor.submit(_fetch_source_news, symbol, name, category)
+                   for symbol, name, category in MARKET_NEWS_SOURCES]
+        results = [future.result() for future in futures]
+    
+    successful_fetches = sum(1 for found, _ in results if found)
+    
+    # Avoid duplicates (check title)
+    seen_titles = set()
+    for _, source_items in results:
+        for news_item in source_items:
+            title_key = news_item['title'].lower()
+            if title_key not in seen_titles:
+                seen_titles.add(title_key)
+                news_items.append(news_item)
+                logger.debug("Added: %.50s...", news_item['title'])
+    
+    logger.debug("Collected %d news items from %d sources", len(news_items), successful_fetches)
+    
+    # If we have some news, return the 20 most recent (by published time)
+    if len(news_items) > 0:
+        return heapq.nlargest(20, news_items, key=lambda x: x.get('published', ''))
+    
+    # Otherwise, return enhanced placeholder news with current market context
+    logger.info("No real-time news found, using enhanced placeholder")
+    return get_enhanced_placeholder_news()
+
+# (keyword, category) pairs checked in order against the lowercased company name
+COMPANY_CATEGORY_KEYWORDS = (
+    ('bank', 'Banking & Finance'),
+    ('finance', 'Banking & Finance'),
+    ('tcs', 'Information Technology'),
+    ('infy', 'Information Technology'),
+    ('tech', 'Information Technology'),
+    ('reliance', 'Energy & Conglomerate'),
+    ('nifty', 'Market Indices'),
+    ('sensex', 'Market Indices'),
+    ('maruti', 'Automobile'),
+    ('unilever', 'FMCG'),
+    ('itc', 'FMCG'),
+    ('airtel', 'Telecommunications'),
+)
+
+def get_category_from_company(company_name):
+    """Determine category based on company name"""
+    name = company_name.lower()
+    for keyword, category in COMPANY_CATEGORY_KEYWORDS:
+        if keyword in name:
+            return category
+    return 'Indian Market'
+
+# Comprehensive list of Indian market sources: (symbol, name, category)
+MARKET_NEWS_SOURCES = tuple(
+    (symbol, name, get_category_from_company(name)) for symbol, name in (
         ('^NSEI', 'NIFTY 50'),
         ('^BSESN', 'SENSEX'),
         ('RELIANCE.NS', 'Reliance Industries'),
@@ -143,113 +326,28 @@ def get_indian_market_news():
         ('LT.NS', 'Larsen & Toubro'),
         ('AXISBANK.NS', 'Axis Bank'),
         ('MARUTI.NS', 'Maruti Suzuki')
-    ]
-    
-    successful_fetches = 0
-    
-    for symbol, name in sources:
-        try:
-            print(f"Trying to fetch news from {name} ({symbol})...")
-            ticker = yf.Ticker(symbol)
-            
-            # Get ticker info to verify it's valid
-            try:
-                info = ticker.info
-                if info:
-                    print(f"✓ {name} ticker is valid")
-            except:
-                print(f"✗ {name} ticker info not available")
-                continue
-            
-            # Try to get news
-            ticker_news = []
-            try:
-                ticker_news = ticker.news
-                if ticker_news:
-                    print(f"✓ Found {len(ticker_news)} news items from {name}")
-                    successful_fetches += 1
-            except:
-                print(f"✗ No news available from {name}")
-                continue
-            
-            if ticker_news and len(ticker_news) > 0:
-                for item in ticker_news[:3]:  # Get up to 3 news from each source
-                    try:
-                        title = item.get('title', '')
-                        
-                        # Skip if no title
-                        if not title or title == '':
-                            continue
-                        
-                        # Skip if title is too short
-                        if len(title) < 10:
-                            continue
-                        
-                        publisher = item.get('publisher', 'Financial News')
-                        link = item.get('link', f'https://finance.yahoo.com/quote/{symbol}')
-                        
-                        # Create news item
-                        news_item = {
-                            'title': title,
-                            'publisher': publisher,
-                            'link': link,
-                            'published': safe_get_time(item),
-                            'thumbnail': safe_get_thumbnail(item),
-                            'source': name,
-                            'category': get_category_from_company(name)
-                        }
-                        
-                        # Avoid duplicates (check title)
-                        if not any(n['title'].lower() == news_item['title'].lower() for n in news_items):
-                            news_items.append(news_item)
-                            print(f"  + Added: {title[:50]}...")
-                    
-                    except Exception as e:
-                        print(f"  - Error parsing news from {name}: {e}")
-                        continue
-                        
-        except Exception as e:
-            print(f"✗ Error fetching from {name}: {e}")
-            continue
-    
-    print(f"\nTotal news items collected: {len(news_items)}")
-    print(f"Successful API calls: {successful_fetches}")
-    
-    # If we have some news, return it
-    if len(news_items) > 0:
-        # Sort by published time (most recent first)
-        try:
-            news_items.sort(key=lambda x: x['published'], reverse=True)
-        except:
-            pass
-        
-        return news_items[:20]  # Return max 20 articles
-    
-    # Otherwise, return enhanced placeholder news with current market context
-    print("No real-time news found, using enhanced placeholder")
-    return get_enhanced_placeholder_news()
+    )
+)
 
-def get_category_from_company(company_name):
-    """Determine category based on company name"""
-    if any(word in company_name.lower() for word in ['bank', 'finance']):
-        return 'Banking & Finance'
-    elif any(word in company_name.lower() for word in ['tcs', 'infy', 'tech']):
-        return 'Information Technology'
-    elif 'reliance' in company_name.lower():
-        return 'Energy & Conglomerate'
-    elif any(word in company_name.lower() for word in ['nifty', 'sensex']):
-        return 'Market Indices'
-    elif 'maruti' in company_name.lower():
-        return 'Automobile'
-    elif any(word in company_name.lower() for word in ['unilever', 'itc']):
-        return 'FMCG'
-    elif 'airtel' in company_name.lower():
-        return 'Telecommunications'
-    else:
-        return 'Indian Market'
+# Placeholder news for the current minute: (minute, list of news items)
+_placeholder_news = (None, None)
 
 def get_enhanced_placeholder_news():
     """Generate enhanced placeholder news with current market context"""
+    global _placeholder_news
+    
+    # Timestamps are minute-granular, so one build serves the whole minute
+    minute = int(time.time() // 60)
+    cached_minute, cached_news_items = _placeholder_news
+    if cached_minute == minute:
+        return list(cached_news_items)
+    
+    news_items = _build_enhanced_placeholder_news()
+    _placeholder_news = (minute, news_items)
+    return list(news_items)
+
+def _build_enhanced_placeholder_news():
+    """Build the placeholder news list for the current time"""
     today = datetime.now()
     current_date = today.strftime('%B %d, %Y')
     
@@ -350,6 +448,15 @@ def get_placeholder_news():
     """Generate placeholder news when API fails - calls enhanced version"""
     return get_enhanced_placeholder_news()
 
+# Stocks whose news stands in for each sector
+SECTOR_NEWS_STOCKS = {
+    'technology': ('TCS.NS', 'INFY.NS'),
+    'banking': ('HDFCBANK.NS', 'ICICIBANK.NS'),
+    'energy': ('RELIANCE.NS', 'ONGC.NS'),
+    'auto': ('MARUTI.NS', 'M&M.NS'),
+    'pharma': ('SUNPHARMA.NS', 'DRREDDY.NS')
+}
+
 def get_sector_news(sector='technology'):
     """
     Get news for specific sectors
@@ -360,15 +467,7 @@ def get_sector_news(sector='technology'):
     Returns:
     - list: News articles
     """
-    sector_stocks = {
-        'technology': ['TCS.NS', 'INFY.NS'],
-        'banking': ['HDFCBANK.NS', 'ICICIBANK.NS'],
-        'energy': ['RELIANCE.NS', 'ONGC.NS'],
-        'auto': ['MARUTI.NS', 'M&M.NS'],
-        'pharma': ['SUNPHARMA.NS', 'DRREDDY.NS']
-    }
-    
-    stocks = sector_stocks.get(sector.lower(), ['TCS.NS'])
+    stocks = SECTOR_NEWS_STOCKS.get(sector.lower(), ('TCS.NS',))
     all_news = []
     
     for stock in stocks[:2]:  # Limit to 2 stocks per sector
@@ -377,6 +476,12 @@ def get_sector_news(sector='technology'):
     
     return all_news[:5]
 
+# Most active stocks shown on the news page
+TRENDING_SYMBOLS = (
+    'RELIANCE.NS', 'TCS.NS', 'HDFCBANK.NS',
+    'INFY.NS', 'ICICIBANK.NS', 'HINDUNILVR.NS'
+)
+
 def get_trending_stocks():
     """
     Get trending/most active stocks with news
@@ -384,37 +489,44 @@ def get_trending_stocks():
     Returns:
     - list: Trending stocks with basic info
     """
-    trending = [
-        'RELIANCE.NS', 'TCS.NS', 'HDFCBANK.NS', 
-        'INFY.NS', 'ICICIBANK.NS', 'HINDUNILVR.NS'
-    ]
-    
     trending_data = []
     
-    for symbol in trending[:6]:
+    # One download for every symbol; previous close and volume come from the bars
+    try:
+        bars = cached_daily_bars(TRENDING_SYMBOLS)
+    except Exception as e:
+        logger.warning("Error downloading trending stocks: %s", e)
+        return trending_data
+    
+    for symbol in TRENDING_SYMBOLS:
         try:
-            ticker = yf.Ticker(symbol)
-            info = ticker.info
-            history = ticker.history(period='1d')
+            history = bars.get(symbol)
             
-            if not history.empty:
-                current_price = history['Close'].iloc[-1]
-                prev_close = info.get('previousClose', current_price)
+            if history is not None:
+                current_price, prev_close = _last_close_and_previous(history)
                 change = ((current_price - prev_close) / prev_close * 100) if prev_close else 0
                 
                 trending_data.append({
                     'symbol': symbol,
-                    'name': info.get('longName', symbol.replace('.NS', '')),
+                    'name': POPULAR_NSE_STOCKS.get(symbol, symbol.replace('.NS', '')),
                     'price': f"₹{current_price:.2f}",
                     'change': f"{change:+.2f}%",
                     'change_value': change,
-                    'volume': info.get('volume', 0)
+                    'volume': int(history['Volume'].iloc[-1])
                 })
         except:
             continue
     
     return trending_data
 
+# Indices in the market summary: name -> symbol
+MARKET_SUMMARY_INDICES = {
+    'NIFTY 50': '^NSEI',
+    'SENSEX': '^BSESN',
+    'NIFTY Bank': '^NSEBANK'
+}
+MARKET_SUMMARY_SYMBOLS = tuple(MARKET_SUMMARY_INDICES.values())
+
 def get_market_summary():
     """
     Get Indian market summary (NIFTY, SENSEX)
@@ -424,29 +536,29 @@ def get_market_summary():
     """
     summary = {}
     
-    indices = {
-        'NIFTY 50': '^NSEI',
-        'SENSEX': '^BSESN',
-        'NIFTY Bank': '^NSEBANK'
-    }
+    # One download for every index
+    try:
+        bars = cached_daily_bars(MARKET_SUMMARY_SYMBOLS)
+    except Exception as e:
+        logger.warning("Error downloading market indices: %s", e)
+        return {name: {'value': 'N/A', 'change': '0', 'change_pct': '0%', 'is_positive': True}
+                for name in MARKET_SUMMARY_INDICES}
     
-    for name, symbol in indices.items():
+    for name, symbol in MARKET_SUMMARY_INDICES.items():
+        if symbol not in bars:
+            continue
+        
         try:
-            ticker = yf.Ticker(symbol)
-            history = ticker.history(period='1d')
+            current, prev_close = _last_close_and_previous(bars[symbol])
+            change = current - prev_close
+            change_pct = (change / prev_close * 100) if prev_close else 0
             
-            if not history.empty:
-                current = history['Close'].iloc[-1]
-                prev_close = ticker.info.get('previousClose', current)
-                change = current - prev_close
-                change_pct = (change / prev_close * 100) if prev_close else 0
-                
-                summary[name] = {
-                    'value': f"{current:,.2f}",
-                    'change': f"{change:+.2f}",
-                    'change_pct': f"{change_pct:+.2f}%",
-                    'is_positive': change >= 0
-                }
+            summary[name] = {
+                'value': f"{current:,.2f}",
+                'change': f"{change:+.2f}",
+                'change_pct': f"{change_pct:+.2f}%",
+                'is_positive': change >= 0
+            }
         except:
             summary[name] = {
                 'value': 'N/A',
@@ -535,34 +647,41 @@ def get_all_news(stock_symbol=None, sector=None, limit=20):
     Returns:
     - dict: Comprehensive news data
     """
-    all_news = {
-        'market_summary': get_market_summary(),
-        'trending_stocks': get_trending_stocks(),
-        'market_news': [],
-        'stock_news': [],
-        'sector_news': [],
-        'economic_calendar': get_economic_calendar()
-    }
-    
-    # Get general market news
-    all_news['market_news'] = format_news_for_display(
-        get_indian_market_news()
-    )
-    
-    # Get stock-specific news if provided
-    if stock_symbol:
-        stock_news = get_stock_news_yfinance(stock_symbol, limit=10)
-        all_news['stock_news'] = format_news_for_display(stock_news)
-    
-    # Get sector news if provided
-    if sector:
-        sector_news = get_sector_news(sector)
-        all_news['sector_news'] = format_news_for_display(sector_news)
+    # The sections are independent network-bound lookups, so run them all at once
+    # (market news fans out further over its own pool)
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        summary_future = executor.submit(get_market_summary)
+        trending_future = executor.submit(get_trending_stocks)
+        market_news_future = executor.submit(get_indian_market_news)
+        stock_news_future = (executor.submit(get_stock_news_yfinance, stock_symbol, limit=10)
+                             if stock_symbol else None)
+        sector_news_future = executor.submit(get_sector_news, sector) if sector else None
+        
+        all_news = {
+            'market_summary': summary_future.result(),
+            'trending_stocks': trending_future.result(),
+            'market_news': [],
+            'stock_news': [],
+            'sector_news': [],
+            'economic_calendar': get_economic_calendar()
+        }
+        
+        # Get general market news
+        all_news['market_news'] = format_news_for_display(market_news_future.result())
+        
+        # Get stock-specific news if provided
+        if stock_news_future is not None:
+            all_news['stock_news'] = format_news_for_display(stock_news_future.result())
+        
+        # Get sector news if provided
+        if sector_news_future is not None:
+            all_news['sector_news'] = format_news_for_display(sector_news_future.result())
     
     return all_news
 
 if __name__ == "__main__":
     # Test the news fetcher
+    logging.basicConfig(level=logging.DEBUG)
     print("="*60)
     print("Stock Market News Fetcher - Test")
     print("="*60)
@@ -0,0 +1,70 @@
+"""
+Password Hashing Helpers
+Argon2id hashing with fallback verification for legacy Werkzeug hashes
+"""
+
+import os
+import threading
+
+from argon2 import PasswordHasher
+from argon2.exceptions import VerificationError, InvalidHashError
+from werkzeug.security import check_password_hash
+
+# Explicit cost parameters (~50ms per hash, 64 MiB memory)
+password_hasher = PasswordHasher(time_cost=2, memory_cost=65536, parallelism=2)
+
+ARGON2_PREFIX = '$argon2'
+
+# Verified against when the email is unknown so login timing does not reveal accounts
+DUMMY_PASSWORD_HASH = password_hasher.hash('dummy-password-for-timing')
+
+# Caps simultaneous hash computations per worker process. Argon2 and
+# pbkdf2 release the GIL, so other threads keep serving requests, but each
+# Argon2 hash holds 64 MiB - a login storm must not claim every core/MiB.
+PASSWORD_HASH_CONCURRENCY = int(os.getenv('PASSWORD_HASH_CONCURRENCY', 4))
+_hash_slots = threading.BoundedSemaphore(PASSWORD_HASH_CONCURRENCY)
+
+def hash_password(password):
+    """
+    Hash a password with Argon2id
+
+    Parameters:
+    - password: Plain text password
+
+    Returns:
+    - str: Encoded hash (includes algorithm and cost parameters)
+    """
+    with _hash_slots:
+        return password_hasher.hash(password)
+
+def verify_password(stored_hash, password):
+    """
+    Verify a password against a stored hash
+
+    Argon2 hashes are checked with argon2-cffi; older pbkdf2:sha256 hashes
+    created by Werkzeug are still accepted so existing users can log in.
+
+    Parameters:
+    - stored_hash: Hash stored in the users table
+    - password: Plain text password to check
+
+    Returns:
+    - bool: True if password matches
+    """
+    if not stored_hash:
+        return False
+
+    with _hash_slots:
+        if stored_hash.startswith(ARGON2_PREFIX):
+            try:
+                return password_hasher.verify(stored_hash, password)
+            except (VerificationError, InvalidHashError):
+                return False
+
+        return check_password_hash(stored_hash, password)
+
+def needs_rehash(stored_hash):
+    """Check if a stored hash is legacy or uses outdated Argon2 parameters"""
+    if not stored_hash.startswith(ARGON2_PREFIX):
+        return True
+    return password_hasher.check_needs_rehash(stored_hash)
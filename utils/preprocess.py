@@ -12,17 +12,12 @@ def preprocess_data(stock_data):
     Returns:
     - Dictionary with preprocessed data
     """
-    # Make a copy to avoid modifying original data
-    data = stock_data.copy()
-    
     # 1. Handle missing values
-    print(f"Missing values before cleaning: {data.isnull().sum().sum()}")
-    
-    # Forward fill missing values
-    data.fillna(method='ffill', inplace=True)
+    print(f"Missing values before cleaning: {stock_data.isnull().sum().sum()}")
     
-    # Backward fill any remaining missing values
-    data.fillna(method='bfill', inplace=True)
+    # Forward fill missing values, then backward fill any remaining ones
+    # (returns a new frame, so the original data is never modified)
+    data = stock_data.ffill().bfill()
     
     print(f"Missing values after cleaning: {data.isnull().sum().sum()}")
     
@@ -50,25 +45,21 @@ def preprocess_data(stock_data):
     features_to_scale = ['Open', 'High', 'Low', 'Close', 'Volume', 
                          'MA_7', 'MA_21', 'Volatility', 'Momentum']
     
-    # Create scaled features
-    scaled_data = data.copy()
-    scaled_data[features_to_scale] = scaler.fit_transform(data[features_to_scale])
+    # Scale the features straight from their array; only the scaled features
+    # are kept, not a second full copy of the frame
+    scaled_array = scaler.fit_transform(data[features_to_scale].to_numpy())
+    scaled_data = pd.DataFrame(scaled_array, index=data.index, columns=features_to_scale)
     
     # 4. Prepare data for models
     # Use previous 60 days to predict next day
     sequence_length = 60
     
-    X = []
-    y = []
-    
-    close_data = scaled_data['Close'].values
+    close_data = scaled_array[:, features_to_scale.index('Close')]
     
-    for i in range(sequence_length, len(close_data)):
-        X.append(close_data[i-sequence_length:i])
-        y.append(close_data[i])
-    
-    X = np.array(X)
-    y = np.array(y)
+    # Row i of X is the window of closes before y[i]; the windows are a
+    # read-only strided view over close_data rather than one copy per day
+    X = np.lib.stride_tricks.sliding_window_view(close_data[:-1], sequence_length)
+    y = close_data[sequence_length:]
     
     # Split data into training and testing sets (80-20 split)
     split_idx = int(len(X) * 0.8)
@@ -106,14 +97,11 @@ def inverse_transform_predictions(predictions, scaler, feature_names):
     # Get the index of 'Close' in feature names
     close_idx = feature_names.index('Close')
     
-    # Create a dummy array with the same shape as training data
-    dummy = np.zeros((len(predictions), len(feature_names)))
-    dummy[:, close_idx] = predictions
-    
-    # Inverse transform
-    denormalized = scaler.inverse_transform(dummy)
+    # MinMaxScaler maps x to x * scale_ + min_; undo that for the Close column only
+    scale = scaler.scale_[close_idx]
+    offset = scaler.min_[close_idx]
     
-    return denormalized[:, close_idx]
+    return (np.asarray(predictions, dtype=np.float64) - offset) / scale
 
 if __name__ == "__main__":
     # Test preprocessing
@@ -5,7 +5,105 @@ Advanced technical analysis tools for stock market predictions
 
 import numpy as np
 import pandas as pd
-from scipy.signal import argrelextrema
+from scipy.ndimage import maximum_filter1d, minimum_filter1d
+from scipy.signal import lfilter
+
+# (pattern, type, description) for each column of the candlestick flag matrix
+CANDLESTICK_PATTERNS = (
+    ('Doji', 'Neutral', 'Indecision in the market'),
+    ('Hammer', 'Bullish', 'Potential bullish reversal'),
+    ('Shooting Star', 'Bearish', 'Potential bearish reversal'),
+    ('Bullish Engulfing', 'Bullish', 'Strong bullish reversal signal'),
+    ('Bearish Engulfing', 'Bearish', 'Strong bearish reversal signal'),
+)
+
+# Categories of the signal columns; code 0 is the default label
+BAND_SIGNALS = ('Neutral', 'Overbought', 'Oversold')
+CROSS_SIGNALS = ('Hold', 'Buy', 'Sell')
+
+def _signal_column(categories, *masks):
+    """
+    Build a categorical signal column: code 0 everywhere, code k where the
+    k-th mask holds (later masks win)
+    """
+    codes = np.zeros(len(masks[0]), dtype=np.int8)
+    for code, mask in enumerate(masks, start=1):
+        codes[mask] = code
+    return pd.Categorical.from_codes(codes, categories=categories)
+
+def _ema(values, span):
+    """
+    Exponential moving average of a float array, same as
+    pd.Series(values).ewm(span=span, adjust=False).mean()
+    
+    Runs the recurrence y[i] = a*x[i] + (1-a)*y[i-1] as one C-level IIR
+    filter; arrays with gaps go through pandas, which skips NaNs.
+    """
+    if len(values) == 0 or np.isnan(values).any():
+        return pd.Series(values).ewm(span=span, adjust=False).mean().to_numpy()
+    
+    alpha = 2.0 / (span + 1)
+    # Initial state chosen so that y[0] = x[0]
+    ema, _ = lfilter([alpha], [1.0, alpha - 1.0], values, zi=[(1.0 - alpha) * values[0]])
+    return ema
+
+def _wilder_average(values, period):
+    """
+    Wilder's smoothed average: seeded with the mean of the first `period`
+    values, then avg = (avg * (period - 1) + value) / period
+    
+    Returns an array aligned with `values`, NaN until the seed is available.
+    """
+    out = np.full(len(values), np.nan)
+    if len(values) < period:
+        return out
+    
+    seed = values[:period].mean()
+    out[period - 1] = seed
+    if len(values) == period:
+        return out
+    
+    # The recurrence is an EMA with alpha = 1 / period, so it runs as one IIR filter
+    alpha = 1.0 / period
+    out[period:], _ = lfilter([alpha], [1.0, alpha - 1.0], values[period:], zi=[(1.0 - alpha) * seed])
+    return out
+
+def _nanmean(values):
+    """Mean of an array ignoring NaNs, NaN if nothing is left (like Series.mean())"""
+    valid = values[~np.isnan(values)]
+    return valid.mean() if len(valid) else np.nan
+
+def _window_extrema(values, order, maxima=False):
+    """
+    Indices whose value equals the min (or max) of the surrounding +/- order
+    bars, the same result as argrelextrema with np.less_equal/np.greater_equal
+    
+    scipy's minimum_filter1d/maximum_filter1d run in O(N) however wide the
+    window; mode='nearest' matches argrelextrema's clipping at the ends.
+    """
+    size = 2 * order + 1
+    nan_mask = np.isnan(values)
+    
+    # argrelextrema rejects any window containing a NaN; fill them so they
+    # can't be picked, then drop those windows below
+    if maxima:
+        filled = np.where(nan_mask, -np.inf, values)
+        is_extreme = filled == maximum_filter1d(filled, size=size, mode='nearest')
+    else:
+        filled = np.where(nan_mask, np.inf, values)
+        is_extreme = filled == minimum_filter1d(filled, size=size, mode='nearest')
+    
+    nan_nearby = maximum_filter1d(nan_mask.astype(np.uint8), size=size, mode='nearest') > 0
+    return np.nonzero(is_extreme & ~nan_nearby)[0]
+
+def _on_balance_volume(close, volume):
+    """Running OBV: add volume on up closes, subtract it on down closes"""
+    # +1/-1/0 per bar (a NaN close counts as unchanged)
+    direction = np.nan_to_num(np.sign(np.diff(close)))
+    
+    obv = np.zeros(len(close))
+    np.cumsum(direction * volume[1:], out=obv[1:])
+    return obv
 
 class TechnicalIndicators:
     """
@@ -18,36 +116,51 @@ class TechnicalIndicators:
         
         Parameters:
         - data: DataFrame with columns ['Date', 'Open', 'High', 'Low', 'Close', 'Volume']
+          (its price columns are shared, not copied: don't modify them afterwards)
         """
-        self.data = data.copy()
-        self.data['Date'] = pd.to_datetime(self.data['Date'])
-        self.data = self.data.sort_values('Date').reset_index(drop=True)
+        # Shallow copy: indicator columns are added to this frame only
+        self.data = data.copy(deep=False)
+        # fetch_stock_data() already returns datetimes; only parse other input
+        if not pd.api.types.is_datetime64_any_dtype(self.data['Date']):
+            self.data['Date'] = pd.to_datetime(self.data['Date'])
+        
+        # Data that is already in date order with a plain 0..n-1 index is used as is
+        if not (self.data['Date'].is_monotonic_increasing
+                and self.data.index.equals(pd.RangeIndex(len(self.data)))):
+            self.data = self.data.sort_values('Date', kind='mergesort', ignore_index=True)
+        
+        # Contiguous float64 price/volume arrays shared by the indicator methods
+        self._open, self._high, self._low, self._close, self._volume = (
+            self.data[col].to_numpy(dtype=np.float64)
+            for col in ('Open', 'High', 'Low', 'Close', 'Volume'))
     
     def calculate_rsi(self, period=14):
         """
         Calculate Relative Strength Index (RSI)
         
         RSI = 100 - (100 / (1 + RS))
-        where RS = Average Gain / Average Loss
+        where RS = Average Gain / Average Loss (Wilder's smoothing)
         
         Values:
         - Above 70: Overbought (potential sell signal)
         - Below 30: Oversold (potential buy signal)
         """
-        delta = self.data['Close'].diff()
+        delta = np.diff(self._close)
         
-        gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
+        # A NaN close counts as no change, as with the old where(delta > 0, 0)
+        gain = np.where(delta > 0, delta, 0.0)
+        loss = np.where(delta < 0, -delta, 0.0)
         
-        rs = gain / loss
-        rsi = 100 - (100 / (1 + rs))
+        rsi_values = np.full(len(self.data), np.nan)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rs = _wilder_average(gain, period) / _wilder_average(loss, period)
+            rsi_values[1:] = 100 - (100 / (1 + rs))
         
+        rsi = pd.Series(rsi_values, index=self.data.index)
         self.data['RSI'] = rsi
         
         # Determine signal
-        self.data['RSI_Signal'] = 'Neutral'
-        self.data.loc[rsi > 70, 'RSI_Signal'] = 'Overbought'
-        self.data.loc[rsi < 30, 'RSI_Signal'] = 'Oversold'
+        self.data['RSI_Signal'] = _signal_column(BAND_SIGNALS, rsi_values > 70, rsi_values < 30)
         
         return rsi
     
@@ -63,26 +176,27 @@ class TechnicalIndicators:
         - MACD crosses above Signal: Bullish (buy)
         - MACD crosses below Signal: Bearish (sell)
         """
-        ema_fast = self.data['Close'].ewm(span=fast, adjust=False).mean()
-        ema_slow = self.data['Close'].ewm(span=slow, adjust=False).mean()
+        macd_values = _ema(self._close, fast) - _ema(self._close, slow)
+        signal_values = _ema(macd_values, signal)
+        
+        # Determine crossover signals from the MACD - signal gap and its previous value
+        diff = macd_values - signal_values
+        prev_diff = np.empty_like(diff)
+        prev_diff[0] = np.nan
+        prev_diff[1:] = diff[:-1]
+        
+        cross = _signal_column(CROSS_SIGNALS,
+                               (diff > 0) & (prev_diff <= 0),
+                               (diff < 0) & (prev_diff >= 0))
         
-        macd_line = ema_fast - ema_slow
-        signal_line = macd_line.ewm(span=signal, adjust=False).mean()
-        histogram = macd_line - signal_line
+        macd_line = pd.Series(macd_values, index=self.data.index)
+        signal_line = pd.Series(signal_values, index=self.data.index)
+        histogram = pd.Series(diff, index=self.data.index)
         
         self.data['MACD'] = macd_line
         self.data['MACD_Signal'] = signal_line
         self.data['MACD_Histogram'] = histogram
-        
-        # Determine crossover signals
-        self.data['MACD_Cross'] = 'Hold'
-        for i in range(1, len(self.data)):
-            if (macd_line.iloc[i] > signal_line.iloc[i] and 
-                macd_line.iloc[i-1] <= signal_line.iloc[i-1]):
-                self.data.loc[i, 'MACD_Cross'] = 'Buy'
-            elif (macd_line.iloc[i] < signal_line.iloc[i] and 
-                  macd_line.iloc[i-1] >= signal_line.iloc[i-1]):
-                self.data.loc[i, 'MACD_Cross'] = 'Sell'
+        self.data['MACD_Cross'] = cross
         
         return macd_line, signal_line, histogram
     
@@ -100,8 +214,11 @@ class TechnicalIndicators:
         - Bands narrow: Low volatility (potential breakout)
         - Bands wide: High volatility
         """
-        sma = self.data['Close'].rolling(window=period).mean()
-        std = self.data['Close'].rolling(window=period).std()
+        # One window object for both statistics; pandas' rolling std uses a
+        # stable online variance, unlike a raw sum-of-squares pass
+        window = self.data['Close'].rolling(window=period)
+        sma = window.mean()
+        std = window.std()
         
         upper_band = sma + (std_dev * std)
         lower_band = sma - (std_dev * std)
@@ -112,9 +229,9 @@ class TechnicalIndicators:
         self.data['BB_Width'] = upper_band - lower_band
         
         # Determine position relative to bands
-        self.data['BB_Signal'] = 'Neutral'
-        self.data.loc[self.data['Close'] >= upper_band, 'BB_Signal'] = 'Overbought'
-        self.data.loc[self.data['Close'] <= lower_band, 'BB_Signal'] = 'Oversold'
+        self.data['BB_Signal'] = _signal_column(BAND_SIGNALS,
+                                                self._close >= upper_band.to_numpy(),
+                                                self._close <= lower_band.to_numpy())
         
         return upper_band, sma, lower_band
     
@@ -127,38 +244,43 @@ class TechnicalIndicators:
         
         Uses local minima for support and local maxima for resistance
         """
+        lows = self._low
+        highs = self._high
+        
         # Find local minima (support levels)
-        support_indices = argrelextrema(self.data['Low'].values, np.less_equal, order=order)[0]
-        support_levels = self.data.iloc[support_indices]['Low'].values
+        support_indices = _window_extrema(lows, order)
+        support_levels = lows[support_indices]
         
         # Find local maxima (resistance levels)
-        resistance_indices = argrelextrema(self.data['High'].values, np.greater_equal, order=order)[0]
-        resistance_levels = self.data.iloc[resistance_indices]['High'].values
+        resistance_indices = _window_extrema(highs, order, maxima=True)
+        resistance_levels = highs[resistance_indices]
         
-        # Cluster similar levels
+        # Cluster similar levels (running sum/count instead of re-averaging each cluster)
         def cluster_levels(levels, tolerance=0.02):
             if len(levels) == 0:
                 return []
             
-            levels = sorted(levels)
+            levels = np.sort(levels).tolist()
             clusters = []
-            current_cluster = [levels[0]]
+            cluster_sum, cluster_count = levels[0], 1
             
             for level in levels[1:]:
-                if abs(level - np.mean(current_cluster)) / np.mean(current_cluster) < tolerance:
-                    current_cluster.append(level)
+                cluster_mean = cluster_sum / cluster_count
+                if abs(level - cluster_mean) / cluster_mean < tolerance:
+                    cluster_sum += level
+                    cluster_count += 1
                 else:
-                    clusters.append(np.mean(current_cluster))
-                    current_cluster = [level]
+                    clusters.append(cluster_mean)
+                    cluster_sum, cluster_count = level, 1
             
-            clusters.append(np.mean(current_cluster))
+            clusters.append(cluster_sum / cluster_count)
             return clusters
         
         support_levels = cluster_levels(support_levels)
         resistance_levels = cluster_levels(resistance_levels)
         
         # Get current price
-        current_price = self.data['Close'].iloc[-1]
+        current_price = self._close[-1]
         
         # Find nearest support and resistance
         support_below = [s for s in support_levels if s < current_price]
@@ -184,36 +306,33 @@ class TechnicalIndicators:
         - Volume spike detection
         - On-Balance Volume (OBV)
         """
+        volume = self._volume
+        
         # Volume moving average
-        self.data['Volume_MA'] = self.data['Volume'].rolling(window=20).mean()
+        volume_ma = self.data['Volume'].rolling(window=20).mean().to_numpy()
         
         # Volume spike (above 2x average)
-        self.data['Volume_Spike'] = self.data['Volume'] > (2 * self.data['Volume_MA'])
+        volume_spike = volume > (2 * volume_ma)
         
         # On-Balance Volume (OBV)
-        obv = [0]
-        for i in range(1, len(self.data)):
-            if self.data['Close'].iloc[i] > self.data['Close'].iloc[i-1]:
-                obv.append(obv[-1] + self.data['Volume'].iloc[i])
-            elif self.data['Close'].iloc[i] < self.data['Close'].iloc[i-1]:
-                obv.append(obv[-1] - self.data['Volume'].iloc[i])
-            else:
-                obv.append(obv[-1])
+        obv = _on_balance_volume(self._close, volume)
         
+        self.data['Volume_MA'] = volume_ma
+        self.data['Volume_Spike'] = volume_spike
         self.data['OBV'] = obv
         
-        # Volume trend
-        recent_volume = self.data['Volume'].iloc[-20:].mean()
-        older_volume = self.data['Volume'].iloc[-40:-20].mean()
+        # Volume trend (tail slices are views, no new Series)
+        recent_volume = _nanmean(volume[-20:])
+        older_volume = _nanmean(volume[-40:-20])
         
         volume_trend = 'Increasing' if recent_volume > older_volume else 'Decreasing'
         
         return {
-            'current_volume': self.data['Volume'].iloc[-1],
-            'avg_volume': self.data['Volume_MA'].iloc[-1],
+            'current_volume': self.data['Volume'].iat[-1],  # keeps the column's int dtype
+            'avg_volume': volume_ma[-1],
             'volume_trend': volume_trend,
-            'obv': self.data['OBV'].iloc[-1],
-            'recent_spikes': self.data['Volume_Spike'].iloc[-10:].sum()
+            'obv': obv[-1],
+            'recent_spikes': volume_spike[-10:].sum()
         }
     
     def detect_candlestick_patterns(self):
@@ -228,94 +347,74 @@ class TechnicalIndicators:
         - Morning Star (bullish reversal)
         - Evening Star (bearish reversal)
         """
-        patterns = []
+        open_, high, low, close = self._open, self._high, self._low, self._close
+        prev_open = np.roll(open_, 1)
+        prev_close = np.roll(close, 1)
         
-        for i in range(2, len(self.data)):
-            open_price = self.data['Open'].iloc[i]
-            close = self.data['Close'].iloc[i]
-            high = self.data['High'].iloc[i]
-            low = self.data['Low'].iloc[i]
-            
-            prev_open = self.data['Open'].iloc[i-1]
-            prev_close = self.data['Close'].iloc[i-1]
-            
-            body = abs(close - open_price)
-            total_range = high - low
-            upper_shadow = high - max(open_price, close)
-            lower_shadow = min(open_price, close) - low
-            
+        body = np.abs(close - open_)
+        total_range = high - low
+        upper_shadow = high - np.maximum(open_, close)
+        lower_shadow = np.minimum(open_, close) - low
+        
+        # One column per CANDLESTICK_PATTERNS entry
+        flags = np.column_stack([
             # Doji: Very small body
-            if total_range > 0 and body / total_range < 0.1:
-                patterns.append({
-                    'date': self.data['Date'].iloc[i],
-                    'pattern': 'Doji',
-                    'type': 'Neutral',
-                    'description': 'Indecision in the market'
-                })
-            
+            (total_range > 0) & (body < 0.1 * total_range),
             # Hammer: Small body, long lower shadow, little/no upper shadow
-            if (body > 0 and lower_shadow > 2 * body and 
-                upper_shadow < body and close > open_price):
-                patterns.append({
-                    'date': self.data['Date'].iloc[i],
-                    'pattern': 'Hammer',
-                    'type': 'Bullish',
-                    'description': 'Potential bullish reversal'
-                })
-            
+            (body > 0) & (lower_shadow > 2 * body) & (upper_shadow < body) & (close > open_),
             # Shooting Star: Small body, long upper shadow, little/no lower shadow
-            if (body > 0 and upper_shadow > 2 * body and 
-                lower_shadow < body and close < open_price):
-                patterns.append({
-                    'date': self.data['Date'].iloc[i],
-                    'pattern': 'Shooting Star',
-                    'type': 'Bearish',
-                    'description': 'Potential bearish reversal'
-                })
-            
+            (body > 0) & (upper_shadow > 2 * body) & (lower_shadow < body) & (close < open_),
             # Bullish Engulfing
-            if (close > open_price and prev_close < prev_open and
-                close > prev_open and open_price < prev_close):
-                patterns.append({
-                    'date': self.data['Date'].iloc[i],
-                    'pattern': 'Bullish Engulfing',
-                    'type': 'Bullish',
-                    'description': 'Strong bullish reversal signal'
-                })
-            
+            (close > open_) & (prev_close < prev_open) & (close > prev_open) & (open_ < prev_close),
             # Bearish Engulfing
-            if (close < open_price and prev_close > prev_open and
-                close < prev_open and open_price > prev_close):
-                patterns.append({
-                    'date': self.data['Date'].iloc[i],
-                    'pattern': 'Bearish Engulfing',
-                    'type': 'Bearish',
-                    'description': 'Strong bearish reversal signal'
-                })
-        
-        return patterns[-10:]  # Return last 10 patterns
+            (close < open_) & (prev_close > prev_open) & (close < prev_open) & (open_ > prev_close)
+        ])
+        
+        # The first two bars have too little history (and np.roll wraps around)
+        flags[:2] = False
+        
+        # Hits in bar order (then pattern order); only the last 10 are returned
+        bars, kinds = np.nonzero(flags)
+        
+        patterns = []
+        for i, kind in zip(bars[-10:], kinds[-10:]):
+            name, pattern_type, description = CANDLESTICK_PATTERNS[kind]
+            patterns.append({
+                'date': self.data['Date'].iloc[i],
+                'pattern': name,
+                'type': pattern_type,
+                'description': description
+            })
+        
+        return patterns
     
-    def calculate_all_indicators(self):
+    def calculate_all_indicators(self, include_details=True):
         """
         Calculate all technical indicators at once
         
+        Support/resistance levels and candlestick patterns don't feed the
+        recommendation, so callers that only need the signals (e.g. the
+        scanner) can skip them.
+        
+        Parameters:
+        - include_details: Also find support/resistance and candlestick patterns
+        
         Returns comprehensive analysis dictionary
         """
         # Calculate all indicators
         rsi = self.calculate_rsi()
         macd, signal, histogram = self.calculate_macd()
         bb_upper, bb_middle, bb_lower = self.calculate_bollinger_bands()
-        support_resistance = self.find_support_resistance()
         volume_analysis = self.analyze_volume()
-        patterns = self.detect_candlestick_patterns()
         
         # Get latest values
         latest_idx = -1
         
         # Overall trend analysis
-        sma_20 = self.data['Close'].rolling(window=20).mean().iloc[latest_idx]
-        sma_50 = self.data['Close'].rolling(window=50).mean().iloc[latest_idx]
-        current_price = self.data['Close'].iloc[latest_idx]
+        # The 20-day SMA is the middle Bollinger band; the 50-day one only needs the last 50 closes
+        sma_20 = bb_middle.iloc[latest_idx]
+        sma_50 = self._close[-50:].mean() if len(self._close) >= 50 else np.nan
+        current_price = self._close[latest_idx]
         
         if current_price > sma_20 > sma_50:
             trend = 'Strong Uptrend'
@@ -352,13 +451,15 @@ class TechnicalIndicators:
                 'signal': self.data['BB_Signal'].iloc[latest_idx],
                 'interpretation': self._interpret_bb(current_price, bb_upper.iloc[latest_idx], bb_lower.iloc[latest_idx])
             },
-            'support_resistance': support_resistance,
             'volume': volume_analysis,
-            'patterns': patterns,
             'sma_20': float(sma_20),
             'sma_50': float(sma_50)
         }
         
+        if include_details:
+            results['support_resistance'] = self.find_support_resistance()
+            results['patterns'] = self.detect_candlestick_patterns()
+        
         # Generate overall recommendation
         results['recommendation'] = self._generate_recommendation(results)
         